@@ -7,17 +7,141 @@ import tkinter as tk
 from tkinter import ttk
 from tkinter import filedialog, messagebox
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import os
+import sys
+import argparse
+import hashlib
+import json
+import sqlite3
+import datetime
+import time
+import tracemalloc
+import cProfile
+import tempfile
+import zipfile
+import re
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
 from io import BytesIO
+import xlsxwriter
+from xlsxwriter.utility import xl_range, xl_rowcol_to_cell
+#parquet cache needs pyarrow, without it the cache falls back to pickle files
+try:
+    import pyarrow
+    cache_format = "parquet"
+except ImportError:
+    cache_format = "pickle"
+#fast rust based xlsx reader, optional
+try:
+    import python_calamine
+    calamine_available = True
+except ImportError:
+    calamine_available = False
+#memory of the run log, without psutil only the time is recorded
+try:
+    import psutil
+    psutil_available = True
+except ImportError:
+    psutil_available = False
 
 #initialize global variables
 file_paths = []
 save_path = 0
 calendarweek = 0
 year = 0
+front_back = 0
 rob_nums = ["Rob_8_1", "Rob_8_2", "Rob_8_3", "Rob_9_1", "Rob_9_2", "Rob_9_3"]
 variant = 0
+#programnumbers specified by technician: door -> variant -> robot -> list of (min, max) programnumber ranges
+#limits are inclusive, None = open, "*" = all robots without an own entry in the door
+#a new model or robot only needs a new entry, all rules are evaluated in one vectorized pass
+variant_routing = {
+    "Vordertür": {
+        "B10": {"*": [(None, 110)]},
+        "C9": {"*": [(111, None)]},
+    },
+    "Hintertür": {
+        #Rob_8_2 uses different programnumbers than the other robots
+        "B10": {"Rob_8_2": [(None, 19)], "*": [(None, 110)]},
+        "C9": {"Rob_8_2": [(21, None)], "*": [(111, None)]},
+    },
+}
+#all variants of the routing table in their order of appearance, every variant gets its sheets and plot
+list_of_variants = list(dict.fromkeys(variant_name for door_routing in variant_routing.values() for variant_name in door_routing))
+#evaluation period of the GUI and the count tables of the streaming mode
+period = "kw"
+period_names = {"Kalenderwoche": "kw", "Monat": "month", "Quartal": "quarter", "Gesamtzeitraum": "gesamt"}
+variant_counts_stream = None
+measurements_stream = None
+#parallel ingestion of the rawdata files, max_workers = None uses all cpu cores
+parallel_loading = True
+max_workers = None
+#header of the loaded rawdata columns
+header = ["Datum", "Programmnummer", "Fehlernummer", "Gesamtlaufzeit",
+        "Schritt 3", "Drehmoment 3", "Drehwinkel 3", "Schritt NOK", 
+        "Drehmoment NOK", "Drehwinkel NOK", "Roboternummer"]
+#failure rate in % above which a robot is marked in the plots and reported by the watch mode
+failure_limit = 0.2
+#resolution and format of the plots in the report, the displayed size in excel does not depend on the dpi
+plot_dpi = 150
+plot_format = "png"
+plot_formats = ["png", "jpeg"]
+#xlsx reader backend: "auto" uses calamine if installed, otherwise the default pandas/openpyxl reader
+#"openpyxl-readonly" streams the rows of the workbook without building the full DOM
+read_engine = "auto"
+read_engines = ["auto", "calamine", "openpyxl-readonly", "openpyxl"]
+rawdata_usecols = [0, 2, 3, 4, 14, 15, 16, 17, 18, 19]
+#compact dtypes of the loaded data, applied per file by apply_schema
+integer_columns = ["Programmnummer", "Fehlernummer"]
+step_columns = ["Schritt 3", "Schritt NOK"]
+float_columns = ["Gesamtlaufzeit", "Drehmoment 3", "Drehwinkel 3", "Drehmoment NOK", "Drehwinkel NOK"]
+#statistics of the measurements per "Datum", "Roboternummer", "Programmnummer" as extra sheets with histograms
+#step 3 values and the runtime are evaluated for the OK screwings, the NOK values for the failed screwings
+export_statistics = True
+measurement_columns = ["Drehmoment 3", "Drehwinkel 3", "Gesamtlaufzeit", "Drehmoment NOK", "Drehwinkel NOK"]
+nok_columns = ["Drehmoment NOK", "Drehwinkel NOK"]
+statistic_quantiles = [0.05, 0.5, 0.95]
+#fixed class width of the histograms, so the histograms of single files can be added up
+histogram_bin_widths = {"Drehmoment 3": 0.05, "Drehwinkel 3": 2.0, "Gesamtlaufzeit": 0.02, "Drehmoment NOK": 0.2, "Drehwinkel NOK": 10.0}
+#tolerance limits for Cp/Cpk: {Messwert: {Programmnummer or "*": [lower limit, upper limit]}}, None = open
+#e.g. {"Drehmoment 3": {"*": [11.0, 13.0], "105": [10.5, 12.5]}}, without limits Cp/Cpk stay empty
+measurement_limits = {}
+#local cache of already parsed rawdata files, cache_version has to be raised if the parsing changes
+use_cache = True
+cache_dir = os.path.join(os.environ.get("LOCALAPPDATA", os.path.expanduser("~")), "Schraubdatenauswertung", "cache")
+cache_max_size_mb = 500
+cache_version = 2
+#manifest of the incremental update mode, stored next to the reports
+manifest_name = "Schraubreport_manifest.json"
+manifest_version = 3
+#measurement parts of the counted files, stored next to the manifest in a database since they are much bigger than the counts
+measurement_store_name = "Schraubreport_measurements.sqlite"
+#local database of daily aggregates for cross-week analyses, filled by every week loaded in the GUI
+use_history_db = True
+history_db_path = os.path.join(os.environ.get("LOCALAPPDATA", os.path.expanduser("~")), "Schraubdatenauswertung", "history.sqlite")
+history_columns = ["Tür", "Datum", "Roboternummer", "Programmnummer", "Fehlernummer", "Variante", "Anzahl"]
+#every run appends its stage timings to the run log next to the reports, profile_runs additionally dumps a cProfile
+run_log_name = "Schraubreport_runlog.jsonl"
+profile_runs = False
+current_run_log = []
+#exit codes of the command line interface
+EXIT_OK = 0
+EXIT_PARTIAL_FAILURE = 1
+EXIT_NO_DATA = 2
+#background worker of the GUI, results and progress are passed to the Tk main loop by gui_queue
+worker_thread = None
+cancel_event = None
+gui_queue = queue.Queue()
+
+class CancelledByUser(Exception):
+    #raised inside a running stage after the user pressed cancel
+    pass
 
 #function definitions
 def open_xlsx_files():
@@ -31,88 +155,582 @@ def open_xlsx_files():
         return
 
     #Select all files in the folders
-    file_paths = []
-    for root, dirs, files in os.walk(folder_paths):
-        for file in files:
-            if file.endswith(".xlsx"):
-                file_paths.append(os.path.join(root, file))
+    file_paths = collect_xlsx_files(folder_paths)
     #failure message if more than one whole possible week was selected
-    #5 robs * 7 days = 35 possible rawdata files
-    if len(file_paths) > 35:
+    #5 robs * 7 days = 35 possible rawdata files, longer periods are evaluated by the streaming mode
+    if period == "kw" and len(file_paths) > 35:
         messagebox.showwarning("Zu viele Dateien", "Bitte wählen Sie maximal 32 .xlsx-Dateien aus")
         return
     #update status
     lbl_status.config(text=f"{len(file_paths)} Datei(en) gefunden")
 
+def collect_xlsx_files(folder):
+    #walk through all subfolders and return every .xlsx file
+    xlsx_files = []
+    for root, dirs, files in os.walk(folder):
+        for file in files:
+            if file.endswith(".xlsx"):
+                xlsx_files.append(os.path.join(root, file))
+    return xlsx_files
+
 def build_dataframe():
-    global rob_nums
-    global df
-    global calendarweek
-    global front_back
-    list_of_df = []
-    calendarweek_status = 0
-    expected_columns = 10
-    
     #errormessage if no rawdata was selected
     if len(file_paths) == 0:
         messagebox.showerror("Keine Daten ausgewählt", "Es wurden keine Daten zur Auswertung ausgewählt!")
         return
+    #only the start and end of every file is read first, wrong cws and broken files are reported before the full load
+    run_in_background(lambda progress, cancel_event: prescan_rawdata_files(file_paths, check_week = period == "kw"), finish_prescan)
+
+def finish_prescan(result):
+    global file_paths
+    valid_files, list_of_rejections, _ = result
+    if list_of_rejections:
+        #long lists are shortened, the dialog would not fit on the screen
+        rejected_files = "\n".join(f"{os.path.basename(file)}: {reason}" for file, reason in list_of_rejections[:10])
+        if len(list_of_rejections) > 10:
+            rejected_files += f"\n... und {len(list_of_rejections) - 10} weitere"
+        if len(valid_files) == 0:
+            messagebox.showerror("Ungültige Dateien", f"❌ Keine der ausgewählten Dateien ist gültig:\n{rejected_files}")
+            return
+        if not messagebox.askyesno("Ungültige Dateien", f"❌ {len(list_of_rejections)} von {len(file_paths)} Datei(en) sind ungültig:\n{rejected_files}\n\n"
+                                   f"Mit den {len(valid_files)} gültigen Datei(en) fortfahren?"):
+            return
+        file_paths = valid_files
+    load_selected_files()
+
+def load_selected_files():
+    global current_run_log
+    #the stages of loading are logged together with the stages of the following export
+    current_run_log = []
+    #months, quarters and multiple cws are only counted file by file, the rawdata is never kept in memory
+    if period != "kw":
+        run_in_background(lambda progress, cancel_event: timed_stage(current_run_log, "Excel laden + Zählen", stream_failure_counts,
+                                                                     file_paths, progress, cancel_event, export_statistics, rows = count_stream_rows),
+                          finish_stream_failure_counts)
+        return
+    #loading runs in the background, finish_build_dataframe is called in the main loop afterwards
+    run_in_background(lambda progress, cancel_event: load_dataframe(file_paths, progress, cancel_event, current_run_log, use_history_db),
+                      finish_build_dataframe)
+
+def load_dataframe(file_paths, progress = None, cancel_event = None, run_log = None, store_history = False):
+    #load all rawdata files (parallel on a process pool), failed files are collected instead of aborting the batch
+    #store_history = True additionally writes the daily aggregates into the history database
+    #returns (df or None, list of (file, errormessage), (calendarweek, year) or None)
+    list_of_df, list_of_errors = timed_stage(run_log, "Excel laden", load_rawdata_files, file_paths, progress = progress, cancel_event = cancel_event,
+                                             rows = lambda result: sum(len(df_file) for df_file in result[0]))
+    if len(list_of_df) == 0:
+        return None, list_of_errors, None
+    report_progress(progress, cancel_event, "Datenstruktur wird aufgebaut")
+    #concat all dfs with all stations, headers and dtypes are already set per file
+    #concat of different categories results in object, so the robot numbers are converted again
+    df_data = timed_stage(run_log, "Datenstruktur", lambda: pd.concat(list_of_df, ignore_index=True).astype({"Roboternummer": "category"}), rows = len)
+    del list_of_df
+    #store the daily aggregates of the week, a failing database must not stop the evaluation
+    front_back = get_front_back(file_paths[0])
+    if store_history and front_back in variant_routing:
+        report_progress(progress, cancel_event, "Tagesaggregate werden gespeichert")
+        try:
+            timed_stage(run_log, "Verlaufsdatenbank", lambda: write_history(history_db_path, create_history_aggregates(df_data, front_back)),
+                        rows = len(df_data))
+        except (sqlite3.Error, OSError, ValueError) as e:
+            print(f"Verlaufsdatenbank '{history_db_path}' konnte nicht geschrieben werden: {e}")
+    return df_data, list_of_errors, timed_stage(run_log, "KW-Prüfung", get_calendarweek, df_data, rows = len(df_data))
+
+def finish_build_dataframe(result):
+    global df
+    global calendarweek
+    global year
+    global front_back
+    df_data, list_of_errors, week_year = result
+    if df_data is None:
+        messagebox.showerror("Fehler beim Laden", "❌ Keine der ausgewählten Dateien konnte verarbeitet werden")
+        return
+    if list_of_errors:
+        failed_files = "\n".join(f"{os.path.basename(file)}: {error}" for file, error in list_of_errors)
+        messagebox.showwarning("Fehler beim Laden", f"❌ {len(list_of_errors)} Datei(en) konnten nicht verarbeitet werden und werden ignoriert:\n{failed_files}")
+    #check if its "Hintertür" or "Vordertür" 
+    front_back = front_back_check()
+    #check selected calendarweek
+    #week_year != None: First till last day is in the same cw
+    #week_year == None: Data is not consitently in the same cw
+    if week_year is not None:
+        df = df_data
+        calendarweek, year = week_year
+        messagebox.showinfo("Datenstruktur erfolgreich", f"Es wurde erfolgreich die Datenstruktur der Variante {front_back} der KW{calendarweek} aufgebaut\n"
+                            f"{len(df)} Zeilen, Speicherbedarf {df.memory_usage(deep = True).sum() / 1024**2:.1f} MB")
     else:
-        #check if its "Hintertür" or "Vordertür" 
-        front_back = front_back_check()
-        for file in file_paths:
+        messagebox.showerror("Fehler beim Aufbau der Datenstruktur", "Es konnte keine Datenstruktur aufgebaut werden, da die Datensätze nicht aus der selben Kalenderwoche sind!")
+        df = 0
+        calendarweek = 0
+
+def finish_stream_failure_counts(result):
+    global variant_counts_stream
+    global measurements_stream
+    variant_counts, list_of_errors, measurements_stream = result
+    if list_of_errors:
+        failed_files = "\n".join(f"{os.path.basename(file)}: {error}" for file, error in list_of_errors)
+        messagebox.showwarning("Fehler beim Laden", f"❌ {len(list_of_errors)} Datei(en) konnten nicht verarbeitet werden und werden ignoriert:\n{failed_files}")
+    if variant_counts is None:
+        messagebox.showerror("Fehler beim Laden", "❌ Keine der ausgewählten Dateien konnte verarbeitet werden")
+        variant_counts_stream = None
+        return
+    variant_counts_stream = variant_counts
+    dates = variant_counts.index.get_level_values("Datum")
+    messagebox.showinfo("Datenstruktur erfolgreich", f"Es wurden {int(variant_counts.sum())} Verschraubungen vom {min(dates):%d.%m.%Y} bis {max(dates):%d.%m.%Y} ausgewertet")
+
+def read_rawdata_file(file, file_cache_dir = None, engine = "openpyxl"):
+    #worker function of the ingestion, has to stay on module level to be usable by the process pool
+    #file_cache_dir = None disables the cache, engine has to be resolved by resolve_read_engine
+    if file_cache_dir:
+        cache_key = get_cache_key(file)
+        df_file = read_cached_file(file_cache_dir, cache_key)
+        if df_file is not None:
+            return df_file
+    expected_columns = 10
+    df_file = read_xlsx_columns(file, engine)
+    #loaded files must content 10 columns
+    if df_file.shape[1] != expected_columns:
+        raise ValueError(f"Datei '{os.path.basename(file)}' hat {df_file.shape[1]} Spalten, erwartet wurden {expected_columns}.")
+    path_parts = os.path.normpath(file).split(os.sep)
+    rob_num_extracted = next((part for part in path_parts if part.startswith("Rob_")), "Unbekannt")
+    df_file["Roboternummer"] = rob_num_extracted
+    #set correct headers
+    df_file.columns = header
+    df_file = apply_schema(df_file)
+    if file_cache_dir:
+        write_cached_file(file_cache_dir, cache_key, df_file)
+    return df_file
+
+def prescan_rawdata_file(file, window = 1 << 18):
+    #reads only the start and the end of the sheet xml inside the xlsx (zip) without building any cells
+    #returns the column count of the header row, the number of data rows and the first and last day of the data
+    with zipfile.ZipFile(file) as archive:
+        head, tail = read_xml_head_tail(archive, get_first_sheet_path(archive), window)
+        head_rows = [match.start() for match in re.finditer(rb"<(?:\w+:)?row[\s>/]", head)]
+        if len(head_rows) == 0:
+            raise ValueError(f"Datei '{os.path.basename(file)}' enthält keine Zeilen.")
+        header_cells = parse_xml_row(head, head_rows[0])
+        num_columns = max(header_cells) + 1 if header_cells else 0
+        #empty rows at the start or end of the data are skipped, the header row may also be in the tail of short files
+        tail_rows = [match.start() for match in re.finditer(rb"<(?:\w+:)?row[\s>/]", tail)][1 if head is tail else 0:]
+        first_value = next((cells[0] for cells in (parse_xml_row(head, start) for start in head_rows[1:]) if 0 in cells), None)
+        last_value = next((cells[0] for cells in (parse_xml_row(tail, start) for start in reversed(tail_rows)) if 0 in cells), None)
+        if first_value is None or last_value is None:
+            raise ValueError(f"Datei '{os.path.basename(file)}' enthält keine Daten.")
+        workbook_xml = archive.read("xl/workbook.xml")
+        is_1904 = re.search(rb'date1904="(1|true)"', workbook_xml) is not None
+        first_day, last_day = [xml_value_to_date(archive, value, is_1904) for value in [first_value, last_value]]
+    #number of rows from the dimension of the sheet, not every writer sets it
+    dimension = re.search(rb'<(?:\w+:)?dimension\s+ref="[A-Z]+\d+:[A-Z]+(\d+)"', head)
+    num_rows = int(dimension.group(1)) - 1 if dimension else None
+    return {"Spalten": num_columns, "Zeilen": num_rows, "erster Tag": first_day, "letzter Tag": last_day}
+
+def read_xml_head_tail(archive, path, window):
+    #decompresses the xml as a stream and only keeps the first and the last window bytes, memory stays flat for big files
+    #returns (head, tail), for small files head and tail are the same object
+    #the head is extended until it contains the header and some data rows
+    head = b""
+    tail = b""
+    num_bytes = 0
+    with archive.open(path) as stream:
+        while True:
+            chunk = stream.read(window)
+            if not chunk:
+                break
+            num_bytes += len(chunk)
+            if len(head) < window or head.count(b"row>") < 4:
+                head += chunk
+            tail = (tail + chunk)[-2 * window:]
+    if len(head) == num_bytes:
+        return head, head
+    return head, tail
+
+def get_first_sheet_path(archive):
+    #path of the first sheet as ordered in the workbook, resolved by the relationships of the workbook
+    workbook_xml = archive.read("xl/workbook.xml")
+    sheet_rid = re.search(rb"<(?:\w+:)?sheet\s[^>]*?\br:id=\"([^\"]+)\"", workbook_xml).group(1)
+    rels_xml = archive.read("xl/_rels/workbook.xml.rels")
+    for relationship in re.finditer(rb"<(?:\w+:)?Relationship\s[^>]*>", rels_xml):
+        if re.search(rb'\bId="' + re.escape(sheet_rid) + rb'"', relationship.group(0)):
+            target = re.search(rb'\bTarget="([^"]+)"', relationship.group(0)).group(1).decode("utf-8")
+            return target.lstrip("/") if target.startswith("/") else f"xl/{target}"
+    raise ValueError("Erstes Tabellenblatt nicht gefunden.")
+
+def parse_xml_row(sheet_xml, start):
+    #returns {column index: (cell type, raw value)} of the row starting at start
+    end = sheet_xml.find(b"row>", start + 4)
+    row_xml = sheet_xml[start:] if end == -1 else sheet_xml[start:end]
+    #self closing empty row
+    if row_xml[:row_xml.find(b">") + 1].endswith(b"/>"):
+        return {}
+    cells = {}
+    for num_cell, cell in enumerate(re.finditer(rb"<(?:\w+:)?c(\s[^>]*?)?(?:/>|>(.*?)</(?:\w+:)?c>)", row_xml, re.DOTALL)):
+        attributes, content = cell.group(1) or b"", cell.group(2) or b""
+        reference = re.search(rb'\br="([A-Z]+)', attributes)
+        col = xlsx_column_index(reference.group(1).decode("ascii")) if reference else num_cell
+        cell_type = re.search(rb'\bt="(\w+)"', attributes)
+        value = re.search(rb"<(?:\w+:)?[vt](?:\s[^>]*)?>(.*?)</(?:\w+:)?[vt]>", content, re.DOTALL)
+        if value is not None:
+            cells[col] = (cell_type.group(1).decode("ascii") if cell_type else "n", value.group(1).decode("utf-8"))
+    return cells
+
+def xlsx_column_index(letters):
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index - 1
+
+def xml_value_to_date(archive, value, is_1904 = False):
+    #the column "Datum" is either an excel serial number or a text
+    cell_type, raw_value = value
+    if cell_type == "s":
+        #shared strings are only parsed up to the needed entry
+        shared_strings = archive.read("xl/sharedStrings.xml")
+        for num_string, string in enumerate(re.finditer(rb"<(?:\w+:)?si>(.*?)</(?:\w+:)?si>", shared_strings, re.DOTALL)):
+            if num_string == int(raw_value):
+                raw_value = "".join(part.decode("utf-8") for part in re.findall(rb"<(?:\w+:)?t(?:\s[^>]*)?>(.*?)</(?:\w+:)?t>", string.group(1), re.DOTALL))
+                break
+        cell_type = "str"
+    if cell_type == "n":
+        epoch = pd.Timestamp("1904-01-01") if is_1904 else pd.Timestamp("1899-12-30")
+        return (epoch + pd.to_timedelta(float(raw_value), unit = "D")).date()
+    return pd.to_datetime(raw_value).date()
+
+def prescan_rawdata_files(file_paths, check_week = True):
+    #fast check of all files before loading: column count, data and (with check_week) the cw of the first and last row
+    #the cw of most files is expected, files of other cws are rejected
+    #returns (list of valid files, list of (file, reason), (calendarweek, year) or None)
+    expected_columns = max(rawdata_usecols) + 1
+    scanned_files = {}
+    list_of_rejections = []
+    for file, (scan, error) in zip(file_paths, scan_rawdata_files(file_paths)):
+        if error is not None:
+            list_of_rejections.append((file, f"nicht lesbar: {error}"))
+        elif scan["Spalten"] < expected_columns:
+            list_of_rejections.append((file, f"{scan['Spalten']} Spalten, erwartet wurden mindestens {expected_columns}"))
+        elif check_week and scan["erster Tag"].isocalendar()[:2] != scan["letzter Tag"].isocalendar()[:2]:
+            list_of_rejections.append((file, f"Daten vom {scan['erster Tag']:%d.%m.%Y} bis {scan['letzter Tag']:%d.%m.%Y} liegen in mehreren KW"))
+        else:
+            scanned_files[file] = scan
+    if not check_week or not scanned_files:
+        return list(scanned_files), list_of_rejections, None
+    weeks = pd.Series({file: scan["erster Tag"].isocalendar()[:2] for file, scan in scanned_files.items()})
+    year_week = weeks.value_counts().index[0]
+    for file, file_week in weeks.items():
+        if file_week != year_week:
+            list_of_rejections.append((file, f"KW{file_week[1]} {file_week[0]} statt KW{year_week[1]} {year_week[0]}"))
+    list_of_rejections.sort(key = lambda rejection: file_paths.index(rejection[0]))
+    valid_files = [file for file in scanned_files if weeks[file] == year_week]
+    return valid_files, list_of_rejections, (year_week[1], year_week[0])
+
+def scan_rawdata_files(file_paths):
+    #prescan of all files, returns a list of (scan or None, errormessage or None) in the order of file_paths
+    def try_prescan(file):
+        try:
+            return prescan_rawdata_file(file), None
+        except (zipfile.BadZipFile, KeyError, AttributeError, ValueError, OSError) as e:
+            return None, str(e)
+
+    if not parallel_loading:
+        return [try_prescan(file) for file in file_paths]
+    #zlib releases the GIL, so the files are decompressed on threads without the startup time of a process pool
+    with ThreadPoolExecutor(max_workers = max_workers or os.cpu_count() or 1) as executor:
+        return list(executor.map(try_prescan, file_paths))
+
+def select_files_by_week(file_paths, year_filter = None, kw_from = None, kw_to = None):
+    #keeps the files with at least one day in the selected year and cw range, only the first and last day of every file is read
+    #unreadable files are kept, so their error is reported by the full load
+    selected_files = []
+    for file, (scan, error) in zip(file_paths, scan_rawdata_files(file_paths)):
+        if error is None:
+            first_day, last_day = sorted([scan["erster Tag"], scan["letzter Tag"]])
+            days = pd.Series(0, index = pd.date_range(first_day, last_day, name = "Datum"))
+            if filter_counts_by_week(days, year_filter, kw_from, kw_to).empty:
+                continue
+        selected_files.append(file)
+    return selected_files
+
+def resolve_read_engine(engine = None):
+    #"auto" falls back to the former pandas/openpyxl reader if calamine is not installed
+    if engine is None:
+        engine = read_engine
+    if engine not in read_engines:
+        raise ValueError(f"Unbekannter Reader '{engine}', erlaubt sind {', '.join(read_engines)}")
+    if engine == "auto":
+        return "calamine" if calamine_available else "openpyxl"
+    if engine == "calamine" and not calamine_available:
+        raise ValueError("Reader 'calamine' benötigt das Paket python-calamine")
+    return engine
+
+def read_xlsx_columns(file, engine):
+    #reads the used columns of the first sheet without the header row
+    if engine == "openpyxl-readonly":
+        return read_xlsx_columns_readonly(file)
+    return pd.read_excel(file, usecols = rawdata_usecols, header = None, skiprows = 1, engine = engine)
+
+def read_xlsx_columns_readonly(file):
+    #streaming openpyxl reader, only the values of the used columns are kept
+    import openpyxl
+    workbook = openpyxl.load_workbook(file, read_only = True, data_only = True)
+    try:
+        row_iter = workbook.worksheets[0].iter_rows(values_only = True)
+        #the header row defines the number of columns
+        header_row = next(row_iter, None)
+        if header_row is None or len(header_row) <= max(rawdata_usecols):
+            raise ValueError(f"Datei '{os.path.basename(file)}' hat zu wenige Spalten, erwartet wurden {max(rawdata_usecols) + 1}.")
+        rows = [[row[col] if col < len(row) else None for col in rawdata_usecols] for row in row_iter]
+    finally:
+        workbook.close()
+    df_file = pd.DataFrame(rows, columns = range(len(rawdata_usecols)))
+    #same dtypes as pd.read_excel, e.g. int64 instead of object for the numbers
+    return df_file.infer_objects()
+
+def apply_schema(df_data):
+    #compact dtypes: categorical robot numbers, smallest integer codes, float32 measurements and datetime "Datum"
+    df_data["Datum"] = pd.to_datetime(df_data["Datum"])
+    df_data["Roboternummer"] = df_data["Roboternummer"].astype("category")
+    for col in integer_columns:
+        df_data[col] = pd.to_numeric(df_data[col], downcast = "integer")
+    #steps and measurements are only converted if the file contains numbers
+    for col in step_columns:
+        if pd.api.types.is_integer_dtype(df_data[col]):
+            df_data[col] = pd.to_numeric(df_data[col], downcast = "integer")
+    for col in float_columns:
+        if pd.api.types.is_numeric_dtype(df_data[col]):
+            df_data[col] = df_data[col].astype("float32")
+    return df_data
+
+def memory_report(df_data):
+    #memory per column with the compact schema compared to the former dtypes (object strings, int64, float64)
+    rows = []
+    for col in df_data.columns:
+        if isinstance(df_data[col].dtype, pd.CategoricalDtype):
+            legacy_col = df_data[col].astype(object)
+        elif pd.api.types.is_integer_dtype(df_data[col]):
+            legacy_col = df_data[col].astype("int64")
+        elif pd.api.types.is_float_dtype(df_data[col]):
+            legacy_col = df_data[col].astype("float64")
+        else:
+            legacy_col = df_data[col]
+        rows.append({
+            "Spalte": col,
+            "dtype": str(df_data[col].dtype),
+            "MB": df_data[col].memory_usage(deep = True, index = False) / 1024**2,
+            "MB ohne Schema": legacy_col.memory_usage(deep = True, index = False) / 1024**2
+        })
+    df_report = pd.DataFrame(rows).set_index("Spalte")
+    df_report.loc["Gesamt"] = ["", df_report["MB"].sum(), df_report["MB ohne Schema"].sum()]
+    return df_report.round({"MB": 2, "MB ohne Schema": 2})
+
+def load_rawdata_files(file_paths, parallel = None, progress = None, cancel_event = None):
+    #returns the loaded dfs in the same order as file_paths and a list of (file, errormessage) for all failed files
+    file_cache_dir = cache_dir if use_cache else None
+    engine = resolve_read_engine()
+    results = [None] * len(file_paths)
+    list_of_errors = []
+    #results come in finishing order for the progress, they are stored by index so the order stays stable
+    for num_done, (index, df_file, error) in enumerate(process_parallel(read_rawdata_file, file_paths, file_cache_dir, engine, parallel = parallel), start = 1):
+        if error is None:
+            results[index] = df_file
+        else:
+            list_of_errors.append((file_paths[index], error))
+        report_progress(progress, cancel_event, f"Datei {num_done}/{len(file_paths)} geladen", num_done / len(file_paths))
+    if file_cache_dir:
+        evict_cache(file_cache_dir, cache_max_size_mb)
+    #errors in the order of file_paths
+    list_of_errors.sort(key = lambda error: file_paths.index(error[0]))
+    list_of_df = [df_file for df_file in results if df_file is not None]
+    return list_of_df, list_of_errors
+
+def process_parallel(func, items, *args, parallel = None):
+    #runs func(item, *args) for every item (e.g. file) and yields (index, result, errormessage) in finishing order
+    #with the process pool only two items per worker are in flight, finished results never pile up in memory
+    if parallel is None:
+        parallel = parallel_loading
+    #a process pool is only worth its startup time with more than one item
+    if not parallel or len(items) <= 1:
+        for index, item in enumerate(items):
             try:
-                df = pd.read_excel(file, usecols = [0, 2, 3, 4, 14, 15, 16, 17, 18, 19], header = None, skiprows = 1)
-                #loaded files must content 10 columns
-                if df.shape[1] != expected_columns:
-                    raise ValueError(f"Datei '{os.path.basename(file)}' hat {df.shape[1]} Spalten, erwartet wurden {expected_columns}.")
-                path_parts = os.path.normpath(file).split(os.sep)
-                rob_num_extracted = next((part for part in path_parts if part.startswith("Rob_")), "Unbekannt")
-                df["Roboternummer"] = rob_num_extracted
-                list_of_df.append(df)
-                
-            #Ffailure message if the readed file is not in correct shape
+                yield index, func(item, *args), None
             except Exception as e:
-                messagebox.showerror("Fehler beim Laden", f"❌ Datei konnte nicht verarbeitet")
-                return 
-        #concat all dfs with all stations
-        df = pd.concat(list_of_df, ignore_index=True)
-        header = ["Datum", "Programmnummer", "Fehlernummer", "Gesamtlaufzeit",
-                "Schritt 3", "Drehmoment 3", "Drehwinkel 3", "Schritt NOK", 
-                "Drehmoment NOK", "Drehwinkel NOK", "Roboternummer"]
-        #set correct headers
-        df.columns = header
-        #check selected calendarweek
-        #calendarweek_status == 1: First till last day is in the same cw
-        #calendarweek_stauts != 0: Data is not consitently in the same cw
-        calendarweek_status = calendarweek_check()
-        
-        if calendarweek_status == 1:
-            messagebox.showinfo("Datenstruktur erfolgreich", f"Es wurde erfolgreich die Datenstruktur der Variante {front_back} der KW{calendarweek} aufgebaut")
+                yield index, None, str(e)
+        return
+    with ProcessPoolExecutor(max_workers = max_workers) as executor:
+        max_in_flight = 2 * (max_workers or os.cpu_count() or 1)
+        next_items = iter(enumerate(items))
+        futures = {}
+        #if the consumer stops (e.g. cancel), leaving the with block only waits for the items in flight
+        while True:
+            for index, item in next_items:
+                futures[executor.submit(func, item, *args)] = index
+                if len(futures) >= max_in_flight:
+                    break
+            if not futures:
+                break
+            done, _ = wait(futures, return_when = FIRST_COMPLETED)
+            for future in done:
+                index = futures.pop(future)
+                try:
+                    yield index, future.result(), None
+                except Exception as e:
+                    yield index, None, str(e)
+
+def report_progress(progress, cancel_event, text, fraction = None):
+    #stops the running stage if the user pressed cancel, otherwise the progress is forwarded to the callback
+    if cancel_event is not None and cancel_event.is_set():
+        raise CancelledByUser()
+    if progress is not None:
+        progress(text, fraction)
+
+def timed_stage(run_log, stage, func, *args, rows = None, report = None, **kwargs):
+    #runs func and appends wall time, rows and memory of the stage to run_log, without run_log func is only called
+    #rows is a number or a function of the result
+    if run_log is None:
+        return func(*args, **kwargs)
+    memory_before = get_memory_mb()
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    log_stage(run_log, stage, time.perf_counter() - start, rows(result) if callable(rows) else rows, memory_before, report)
+    return result
+
+def log_stage(run_log, stage, seconds, rows = None, memory_before = None, report = None):
+    if run_log is None:
+        return
+    memory_after = get_memory_mb()
+    run_log.append({
+        "stage": stage,
+        "report": report,
+        "seconds": round(seconds, 4),
+        "rows": rows,
+        "rows_per_s": round(rows / seconds) if rows and seconds else None,
+        "rss_mb": memory_after,
+        "rss_delta_mb": round(memory_after - memory_before, 1) if memory_after is not None and memory_before is not None else None
+    })
+
+def get_memory_mb():
+    #resident memory of the own process (the worker processes of the pool are not included)
+    if not psutil_available:
+        return None
+    return round(psutil.Process().memory_info().rss / 1024**2, 1)
+
+def write_run_log(folder, run_log, command, total_seconds):
+    #appends one json line per stage and the total wall time to the run log in folder
+    #the stages of parallel report workers overlap, so the total is measured and not the sum of the stages
+    run_id = f"{datetime.datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}"
+    records = run_log + [{"stage": "Gesamt", "seconds": round(total_seconds, 4)}]
+    with open(os.path.join(folder, run_log_name), "a", encoding = "utf-8") as f:
+        for record in records:
+            f.write(json.dumps(dict({"run": run_id, "command": command}, **record), ensure_ascii = False) + "\n")
+
+def run_logged(folder, command, func, *args, run_log = None, profile = None, **kwargs):
+    #runs func with a run log (passed as run_log) and writes the log into folder afterwards, also if func fails
+    #with profile (default profile_runs) the whole run is additionally dumped as cProfile next to the log
+    #stages already in run_log (e.g. loading in the GUI) ran one after another before this run
+    #cProfile only sees the calling thread, so the process pools and threads are disabled (parallel_loading) while profiling
+    global parallel_loading
+    run_log = [] if run_log is None else run_log
+    previous_seconds = sum(record["seconds"] for record in run_log)
+    profile = profile_runs if profile is None else profile
+    profiler = cProfile.Profile() if profile else None
+    parallel_before = parallel_loading
+    if profiler:
+        parallel_loading = False
+        profiler.enable()
+    start = time.perf_counter()
+    try:
+        return func(*args, run_log = run_log, **kwargs)
+    finally:
+        if profiler:
+            profiler.disable()
+            parallel_loading = parallel_before
+            profiler.dump_stats(os.path.join(folder, f"Schraubreport_profile_{datetime.datetime.now():%Y%m%d-%H%M%S}.prof"))
+        try:
+            write_run_log(folder, run_log, command, previous_seconds + time.perf_counter() - start)
+        except OSError as e:
+            print(f"Laufprotokoll konnte nicht geschrieben werden: {e}")
+
+def count_stream_rows(result):
+    #screwings of the result of stream_failure_counts
+    variant_counts = result[0]
+    return int(variant_counts.sum()) if variant_counts is not None else 0
+
+def get_cache_key(file):
+    #key of the cache entry: path, mtime, size and content hash of the rawdata file
+    stat = os.stat(file)
+    hasher = hashlib.sha256()
+    hasher.update(f"{cache_version}|{os.path.normcase(os.path.abspath(file))}|{stat.st_mtime_ns}|{stat.st_size}|".encode("utf-8"))
+    with open(file, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def read_cached_file(file_cache_dir, cache_key):
+    #returns the cached df or None if there is no valid cache entry
+    cache_file = os.path.join(file_cache_dir, f"{cache_key}.{cache_format}")
+    if not os.path.exists(cache_file):
+        return None
+    try:
+        if cache_format == "parquet":
+            df_file = pd.read_parquet(cache_file)
         else:
-            messagebox.showerror("Fehler beim Aufbau der Datenstruktur", "Es konnte keine Datenstruktur aufgebaut werden, da die Datensätze nicht aus der selben Kalenderwoche sind!")
-            df = 0
-            calendarweek = 0
+            df_file = pd.read_pickle(cache_file)
+        #touch the entry so the eviction removes the least recently used files first
+        os.utime(cache_file)
+        return df_file
+    except Exception:
+        #broken cache entries are parsed again from the rawdata file
+        return None
 
-def calendarweek_check():
-    global df
-    global calendarweek
-    global year
-    #select col Datum from df and set it to a datetime object
-    df['Datum'] = pd.to_datetime(df['Datum'])
-    #split df["Datum"] into iso with week and year
-    iso = df["Datum"].dt.isocalendar()
+def write_cached_file(file_cache_dir, cache_key, df_file):
+    cache_file = os.path.join(file_cache_dir, f"{cache_key}.{cache_format}")
+    #write into a temp file first so parallel workers never read half written entries
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(file_cache_dir, exist_ok = True)
+        if cache_format == "parquet":
+            df_file.to_parquet(tmp_file, index = False)
+        else:
+            df_file.to_pickle(tmp_file)
+        os.replace(tmp_file, cache_file)
+    except Exception as e:
+        #a failing cache must never stop the evaluation
+        print(f"Cache-Eintrag konnte nicht geschrieben werden: {e}")
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+def evict_cache(file_cache_dir, max_size_mb):
+    #delete the least recently used entries until the cache is smaller than max_size_mb
+    if not os.path.isdir(file_cache_dir):
+        return
+    entries = []
+    for entry in os.scandir(file_cache_dir):
+        if entry.is_file() and entry.name.endswith((".parquet", ".pickle")):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    cache_size = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if cache_size <= max_size_mb * 1024 * 1024:
+            break
+        try:
+            os.remove(path)
+            cache_size -= size
+        except OSError:
+            pass
+
+def get_calendarweek(df_data):
+    #split df_data["Datum"] into iso with week and year
+    #returns (calendarweek, year) if all data is within the same cw, otherwise None
+    iso = df_data["Datum"].dt.isocalendar()
     if iso['week'].nunique() == 1 and iso['year'].nunique() == 1:
-        calendarweek = iso['week'].iloc[0]
-        year = iso['year'].iloc[0]
-        return 1
-    else:
-        return 0
+        return iso['week'].iloc[0], iso['year'].iloc[0]
+    return None
 
 def front_back_check():
     #select first file within file_paths (in file_paths must always be minimum of one file)
-    path_parts = file_paths[0]
-    path_parts = os.path.normpath(path_parts).split(os.sep)
+    return get_front_back(file_paths[0])
+
+def get_front_back(file):
+    path_parts = os.path.normpath(file).split(os.sep)
     front_back_keywords = ["Hintertür", "Vordertür"]
     #check for keyword in the path
     front_back = next((part for part in path_parts if part in front_back_keywords), "Unbekannt")
@@ -130,127 +748,923 @@ def select_save_path():
     messagebox.showinfo("Ordnerwahl erfolgreich", "Es wurde erfolgreich ein Ordner zur Abspeicherung ausgewählt.")
 
 def main_filter_func():
-    #initialize needed lists
-    list_of_df_daily = []
-    list_of_df_weekly = []
-    list_of_plots = []
-    list_of_variants = ["B10", "C9"]
+    #months, quarters and multiple cws are created from the count tables of the streaming mode
+    if period != "kw":
+        if save_path and variant_counts_stream is not None:
+            run_in_background(lambda progress, cancel_event: run_logged(save_path, "export", create_period_reports, variant_counts_stream, period, save_path,
+                                                                        progress, cancel_event, run_log = list(current_run_log),
+                                                                        measurements = measurements_stream),
+                              lambda list_of_save_names: messagebox.showinfo("Export erfolgreich", f"Es wurden {len(list_of_save_names)} Report(s) erfolgreich exportiert."))
+        else:
+            messagebox.showerror("Ungültige Angabe", "Es wurden nicht alle Parameter korrekt gesetzt um den Prozess zu starten.")
+        return
     #check if all data was set as needed
     if save_path and calendarweek and front_back != 0:
-        
-        #check for the front_back information that is in the folder path
-        if front_back == "Vordertür":
-            #iterate through the two production models
-            for variant in list_of_variants:
-                if variant == "B10":
-                    #programnumbers specified by technician
-                    df_filtered = df[df["Programmnummer"] < 111]
-                    #create plots and dataframes and .append to correct list
-                    fig = create_failure_plot(df_filtered, variant)        
-                    df_grouped_detailed = create_detailed_dataframe(df_filtered)
-                    df_grouped_detailed_weekly = create_detailed_dataframe_weekly(df_filtered)
-                    list_of_plots.append(fig)
-                    list_of_df_daily.append(df_grouped_detailed)
-                    list_of_df_weekly.append(df_grouped_detailed_weekly)
-                else:
-                    #programnumbers specified by technician
-                    df_filtered = df[df["Programmnummer"] >= 111]
-                    #create plots and dataframes and .append to correct list
-                    fig = create_failure_plot(df_filtered, variant)        
-                    df_grouped_detailed = create_detailed_dataframe(df_filtered)
-                    df_grouped_detailed_weekly = create_detailed_dataframe_weekly(df_filtered)
-                    list_of_plots.append(fig)
-                    list_of_df_daily.append(df_grouped_detailed)
-                    list_of_df_weekly.append(df_grouped_detailed_weekly)
-        elif front_back == "Hintertür":
-            for variant in list_of_variants:
-                #iterate through the two production models
-                if variant == "B10":
-                    #programnumbers specified by technician
-                    #split df into two dfs to make varying filtering 
-                    df_rob_8_2 = df[df["Roboternummer"] == "Rob_8_2"]
-                    df_other_robs = df[df["Roboternummer"] != "Rob_8_2"]
-                    df_rob_8_2 = df_rob_8_2[df_rob_8_2["Programmnummer"] < 20]
-                    df_other_robs = df_other_robs[df_other_robs["Programmnummer"]< 111]
-                    #concatenate filtered dataframes into one
-                    df_filtered = pd.concat([df_rob_8_2, df_other_robs], ignore_index = True)
-                    #create plots and dataframes and .append to correct list
-                    fig = create_failure_plot(df_filtered, variant)        
-                    df_grouped_detailed = create_detailed_dataframe(df_filtered)
-                    df_grouped_detailed_weekly = create_detailed_dataframe_weekly(df_filtered)
-                    list_of_plots.append(fig)
-                    list_of_df_daily.append(df_grouped_detailed)
-                    list_of_df_weekly.append(df_grouped_detailed_weekly)
-                else:
-                    #programnumbers specified by technician
-                    #split df into two dfs to make varying filtering 
-                    df_rob_8_2 = df[df["Roboternummer"] == "Rob_8_2"]
-                    df_other_robs = df[df["Roboternummer"] != "Rob_8_2"]
-                    df_rob_8_2 = df_rob_8_2[df_rob_8_2["Programmnummer"] > 20]
-                    df_other_robs = df_other_robs[df_other_robs["Programmnummer"] > 111]
-                    #concatenate filtered dataframes into one
-                    df_filtered = pd.concat([df_rob_8_2, df_other_robs], ignore_index = True)
-                    #create plots and dataframes and .append to correct list
-                    fig = create_failure_plot(df_filtered, variant)        
-                    df_grouped_detailed = create_detailed_dataframe(df_filtered)
-                    df_grouped_detailed_weekly = create_detailed_dataframe_weekly(df_filtered)
-                    list_of_plots.append(fig)
-                    list_of_df_daily.append(df_grouped_detailed)
-                    list_of_df_weekly.append(df_grouped_detailed_weekly)
-        #plot and dataframe export
-        create_export(list_of_df_daily, list_of_df_weekly, list_of_plots)
-        messagebox.showinfo("Export erfolgreich", "Der Export wurde erfolgreich durchgeführt.")
+        #filtering, plots and export run in the background
+        run_in_background(lambda progress, cancel_event: run_logged(save_path, "export", create_report, df, front_back, calendarweek, year, save_path,
+                                                                    progress, cancel_event, run_log = list(current_run_log)),
+                          lambda save_name: messagebox.showinfo("Export erfolgreich", "Der Export wurde erfolgreich durchgeführt."))
     else:
         messagebox.showerror("Ungültige Angabe", "Es wurden nicht alle Parameter korrekt gesetzt um den Prozess zu starten.")
-        
-def create_failure_plot(df_filtered, variant):
-    #1.         .groupby "Datum", "Roboternummer"; group_keys = False for next .apply func
-    #2.         .apply: lambda func that iterates through set groupby filters and calculates the "Fehler in %" value of all days seperately per robot
-    #3.         .reset_index: set index of new col "Fehleranteil in %"
-    df_failure = (df_filtered.groupby(["Datum", "Roboternummer"], group_keys = False)
-    .apply(lambda df_lambda: (df_lambda["Fehlernummer"] != 0).sum() / len(df_lambda) * 100)
-    .reset_index(name="Fehleranteil in %")
-    )
 
+def create_report(df, front_back, calendarweek, year, save_path, progress = None, cancel_event = None, run_log = None):
+    #filter, plot and export the data of one cw, independent of the GUI so it can also be used by the cli
+    report_progress(progress, cancel_event, "Aggregation", 0)
+    variant_counts = timed_stage(run_log, "Aggregation", create_variant_counts, df, front_back, rows = len(df))
+    measurements = None
+    if export_statistics:
+        report_progress(progress, cancel_event, "Statistik", 0)
+        measurements = timed_stage(run_log, "Statistik", create_measurements, df, rows = len(df))
+    save_name = f"{save_path}/Schraubreport_{front_back}_KW{calendarweek}_{year}.xlsx"
+    return create_report_from_counts(variant_counts, front_back, f"Kalenderwoche = {calendarweek}", save_name,
+                                     progress = progress, cancel_event = cancel_event, run_log = run_log, measurements = measurements)
+
+def create_report_from_counts(variant_counts, front_back, period_title, save_name, plot_by_week = False, summary_name = "weekly",
+                              progress = None, cancel_event = None, dpi = None, image_format = None, run_log = None, measurements = None):
+    #creates plots, daily and summary sheets of all variants out of the count table of create_variant_counts
+    #measurements = (statistics, histogram counts) of create_measurements adds a statistics sheet with histogram per measurement
+    #rows of the report stages are the evaluated screwings
+    num_rows = int(variant_counts.sum())
+    report = os.path.basename(save_name)
+    list_of_df_daily, list_of_df_weekly, list_of_plot_jobs, list_of_sheets_by_week = timed_stage(run_log, "Tabellen", prepare_report, variant_counts,
+                                                                                                 front_back, period_title, plot_by_week, summary_name,
+                                                                                                 progress, cancel_event, rows = num_rows, report = report)
+    report_progress(progress, cancel_event, "Diagramme", 2 / 4)
+    list_of_images = timed_stage(run_log, "Diagramme", render_failure_plots, list_of_plot_jobs, dpi, image_format, rows = num_rows, report = report)
+    list_of_extra_sheets = list_of_sheets_by_week
+    list_of_extra_images = []
+    if measurements is not None:
+        list_of_statistic_sheets, list_of_histogram_jobs = prepare_statistics(measurements, front_back, period_title)
+        list_of_histograms = timed_stage(run_log, "Histogramme", render_failure_plots, list_of_histogram_jobs, dpi, image_format,
+                                         create_plot = create_histogram_plot, rows = num_rows, report = report)
+        list_of_extra_sheets = list_of_statistic_sheets + list_of_extra_sheets
+        list_of_extra_images = [(sheet_name, image_stream) for (sheet_name, _), image_stream in zip(list_of_statistic_sheets, list_of_histograms)]
+    #plot and dataframe export
+    report_progress(progress, cancel_event, "Excel-Export", 3 / 4)
+    timed_stage(run_log, "Excel-Export", create_export, list_of_df_daily, list_of_df_weekly, list_of_images, save_name, summary_name,
+                list_of_extra_sheets, list_of_extra_images, rows = num_rows, report = report)
+    return save_name
+
+def prepare_report(variant_counts, front_back, period_title, plot_by_week = False, summary_name = "weekly", progress = None, cancel_event = None):
+    #daily and summary sheets and the plot jobs of all variants
+    #returns (list_of_df_daily, list_of_df_weekly, list_of_plot_jobs, list_of_sheets_by_week)
+    #initialize needed lists
+    list_of_df_daily = []
+    list_of_df_weekly = []
+    list_of_plot_jobs = []
+    list_of_sheets_by_week = []
+    average_label = "Ø Woche" if summary_name == "weekly" else "Ø Zeitraum"
+    for variant in list_of_variants:
+        report_progress(progress, cancel_event, f"Auswertung {variant}", (list_of_variants.index(variant) + 1) / (2 * len(list_of_variants)))
+        #variants without any data keep an empty count table
+        if variant in variant_counts.index.get_level_values("Variante"):
+            failure_counts = variant_counts.xs(variant, level = "Variante")
+        else:
+            failure_counts = variant_counts.iloc[:0].droplevel("Variante")
+        #longer periods are plotted per cw instead of per day
+        plot_counts = group_counts_by_week(failure_counts) if plot_by_week else failure_counts
+        #create dataframes and .append to correct list, the plots are rendered together afterwards
+        df_grouped_detailed = create_detailed_dataframe(failure_counts)
+        df_grouped_detailed_weekly = create_detailed_dataframe_weekly(failure_counts)
+        list_of_plot_jobs.append((plot_counts, variant, front_back, period_title, average_label))
+        list_of_df_daily.append(df_grouped_detailed)
+        list_of_df_weekly.append(df_grouped_detailed_weekly)
+        #reports over several cws get an additional summary sheet per cw and variant
+        if plot_by_week:
+            list_of_sheets_by_week += create_sheets_by_week(failure_counts, variant)
+    return list_of_df_daily, list_of_df_weekly, list_of_plot_jobs, list_of_sheets_by_week
+
+def create_sheets_by_week(failure_counts, variant):
+    #returns a list of (sheet_name, summary df) for every cw in failure_counts
+    if failure_counts.empty:
+        return []
+    iso = pd.DatetimeIndex(failure_counts.index.get_level_values("Datum")).isocalendar()
+    list_of_sheets = []
+    for (iso_year, calendarweek), week_counts in failure_counts.groupby([iso["year"].to_numpy(), iso["week"].to_numpy()]):
+        list_of_sheets.append((f"{variant} KW{calendarweek:02d} {iso_year}", create_detailed_dataframe_weekly(week_counts)))
+    return list_of_sheets
+
+def assign_variant(df_data, front_back):
+    #evaluates the routing table of the door and returns the "Variante" of every row (NaN if no rule matches)
+    if front_back not in variant_routing:
+        raise ValueError(f"Unbekannte Tür '{front_back}', erwartet wurde {' oder '.join(variant_routing)}.")
+    door_routing = variant_routing[front_back]
+    program_numbers = df_data["Programmnummer"].to_numpy()
+    robots = df_data["Roboternummer"]
+    specific_robots = {robot for robot_rules in door_routing.values() for robot in robot_rules if robot != "*"}
+    is_other_robot = ~robots.isin(specific_robots).to_numpy()
+    conditions = []
+    choices = []
+    for variant_name, robot_rules in door_routing.items():
+        for robot, ranges in robot_rules.items():
+            is_robot = is_other_robot if robot == "*" else (robots == robot).to_numpy()
+            for range_min, range_max in ranges:
+                condition = is_robot.copy()
+                if range_min is not None:
+                    condition &= program_numbers >= range_min
+                if range_max is not None:
+                    condition &= program_numbers <= range_max
+                conditions.append(condition)
+                choices.append(variant_name)
+    #first matching rule wins, rows without a rule are not evaluated
+    codes = np.select(conditions, [list_of_variants.index(choice) for choice in choices], default = -1)
+    return pd.Series(pd.Categorical.from_codes(codes, categories = list_of_variants), index = df_data.index, name = "Variante")
+
+def create_variant_counts(df_data, front_back):
+    #count table (Variante, Datum, Roboternummer, Fehlernummer) of all variants, the base of every report
+    #the variant is assigned once, the data is neither copied nor concatenated per variant
+    return create_failure_counts(df_data, assign_variant(df_data, front_back))
+
+def count_rawdata_file(file, file_cache_dir = None, engine = "openpyxl", with_measurements = False):
+    #worker function of the streaming mode, only the small count table of the file leaves the worker process
+    #with_measurements additionally returns the mergeable measurement parts of the file, every file is read only once
+    #returns (count table, measurement parts or None), both with the level "Tür"
+    df_file = read_rawdata_file(file, file_cache_dir, engine)
+    front_back = get_front_back(file)
+    variant_counts = create_variant_counts(df_file, front_back)
+    measurement_parts = add_door_level(create_measurement_parts(df_file), front_back) if with_measurements else None
+    return pd.concat([variant_counts], keys = [front_back], names = ["Tür"]), measurement_parts
+
+def merge_failure_counts(list_of_counts):
+    #sums count tables, equal (Tür, Variante, Datum, Roboternummer, Fehlernummer) entries are added up
+    counts = pd.concat(list_of_counts)
+    return counts.groupby(level = list(range(counts.index.nlevels))).sum()
+
+def stream_failure_counts(file_paths, progress = None, cancel_event = None, with_measurements = False):
+    #streaming mode: every file is reduced to its count table right after loading and added to running counters
+    #memory stays flat regardless of the number of files
+    #with_measurements also merges the measurement parts of the files in the same pass
+    #returns (count table with the additional level "Tür" or None, list of (file, errormessage), measurement parts with level "Tür" or None)
+    file_cache_dir = cache_dir if use_cache else None
+    engine = resolve_read_engine()
+    running_counts = None
+    running_parts = None
+    pending_counts = []
+    pending_parts = []
+    list_of_errors = []
+    for num_done, (index, result, error) in enumerate(process_parallel(count_rawdata_file, file_paths, file_cache_dir, engine, with_measurements),
+                                                      start = 1):
+        if error is None:
+            pending_counts.append(result[0])
+            if result[1] is not None:
+                pending_parts.append(result[1])
+        else:
+            list_of_errors.append((file_paths[index], error))
+        #merge the counters in batches, merging after every single file would be slower
+        if len(pending_counts) >= 20:
+            running_counts = merge_failure_counts([c for c in [running_counts] + pending_counts if c is not None])
+            running_parts = merge_measurement_parts([p for p in [running_parts] + pending_parts if p is not None])
+            pending_counts = []
+            pending_parts = []
+        report_progress(progress, cancel_event, f"Datei {num_done}/{len(file_paths)} gezählt", num_done / len(file_paths))
+    if pending_counts:
+        running_counts = merge_failure_counts([c for c in [running_counts] + pending_counts if c is not None])
+        running_parts = merge_measurement_parts([p for p in [running_parts] + pending_parts if p is not None])
+    if file_cache_dir:
+        evict_cache(file_cache_dir, cache_max_size_mb)
+    list_of_errors.sort(key = lambda error: file_paths.index(error[0]))
+    return running_counts, list_of_errors, running_parts
+
+def filter_counts_by_week(variant_counts, year_filter = None, kw_from = None, kw_to = None):
+    #keeps the counts of the selected year and cw range
+    iso = pd.DatetimeIndex(variant_counts.index.get_level_values("Datum")).isocalendar()
+    mask = np.ones(len(variant_counts), dtype = bool)
+    if year_filter is not None:
+        mask &= (iso["year"] == year_filter).to_numpy()
+    if kw_from is not None:
+        mask &= (iso["week"] >= kw_from).to_numpy()
+    if kw_to is not None:
+        mask &= (iso["week"] <= kw_to).to_numpy()
+    return variant_counts[mask]
+
+def group_counts_by_week(failure_counts):
+    #replaces the "Datum" of the counts by its cw, used for the plots of longer periods
+    iso = pd.DatetimeIndex(failure_counts.index.get_level_values("Datum")).isocalendar()
+    week_labels = [f"{iso_year}-KW{iso_week:02d}" for iso_year, iso_week in zip(iso["year"], iso["week"])]
+    index = failure_counts.index
+    return failure_counts.groupby([pd.Index(week_labels, name = "Datum"), index.get_level_values("Roboternummer"), index.get_level_values("Fehlernummer")]).sum()
+
+def split_counts_by_period(variant_counts, front_back, period, save_path):
+    #splits the counts of one door into report jobs of the period "kw", "month", "quarter" or "gesamt"
+    #returns a list of (variant_counts, front_back, period_title, save_name, plot_by_week, summary_name)
+    dates = pd.DatetimeIndex(variant_counts.index.get_level_values("Datum"))
+    if period == "kw":
+        iso = dates.isocalendar()
+        key_years, key_nums = iso["year"].to_numpy(), iso["week"].to_numpy()
+    elif period == "month":
+        key_years, key_nums = dates.year, dates.month
+    elif period == "quarter":
+        key_years, key_nums = dates.year, dates.quarter
+    elif period == "gesamt":
+        key_years, key_nums = np.zeros(len(dates), dtype = int), np.zeros(len(dates), dtype = int)
+    else:
+        raise ValueError(f"Unbekannter Zeitraum '{period}'")
+    report_jobs = []
+    for (key_year, key_num), period_counts in variant_counts.groupby([np.asarray(key_years), np.asarray(key_nums)]):
+        if period == "kw":
+            period_title = f"Kalenderwoche = {key_num}"
+            save_name = f"{save_path}/Schraubreport_{front_back}_KW{key_num}_{key_year}.xlsx"
+        elif period == "month":
+            period_title = f"Monat = {key_num:02d}/{key_year}"
+            save_name = f"{save_path}/Schraubreport_{front_back}_{key_year}-{key_num:02d}.xlsx"
+        elif period == "quarter":
+            period_title = f"Quartal = Q{key_num}/{key_year}"
+            save_name = f"{save_path}/Schraubreport_{front_back}_Q{key_num}_{key_year}.xlsx"
+        else:
+            first_day = min(period_counts.index.get_level_values("Datum"))
+            last_day = max(period_counts.index.get_level_values("Datum"))
+            period_title = f"Zeitraum = {first_day:%d.%m.%Y} - {last_day:%d.%m.%Y}"
+            save_name = f"{save_path}/Schraubreport_{front_back}_{first_day:%Y-%m-%d}_bis_{last_day:%Y-%m-%d}.xlsx"
+        #longer periods are plotted per cw and get a summary sheet "gesamt" instead of "weekly"
+        if period == "kw":
+            report_jobs.append((period_counts, front_back, period_title, save_name, False, "weekly"))
+        else:
+            report_jobs.append((period_counts, front_back, period_title, save_name, True, "gesamt"))
+    return report_jobs
+
+def select_period_jobs(counts, period, save_path, affected_days = None):
+    #report jobs of all doors of the streaming count table (with level "Tür")
+    #with affected_days = set of (Tür, Datum) only the jobs containing one of these days are returned
+    report_jobs = []
+    for front_back in counts.index.get_level_values("Tür").unique():
+        for job in split_counts_by_period(counts.xs(front_back, level = "Tür"), front_back, period, save_path):
+            job_days = set(job[0].index.get_level_values("Datum"))
+            if affected_days is None or any((front_back, day) in affected_days for day in job_days):
+                report_jobs.append(job)
+    return report_jobs
+
+def create_period_reports(counts, period, save_path, progress = None, cancel_event = None, affected_days = None, run_log = None, measurements = None):
+    #creates all reports of the streaming count table (with level "Tür"), returns the list of saved files
+    #with affected_days = set of (Tür, Datum) only the reports containing one of these days are created
+    #measurements = merged measurement parts with level "Tür" adds the statistics sheets to every report
+    list_of_save_names = []
+    report_jobs = select_period_jobs(counts, period, save_path, affected_days)
+    for num_job, job in enumerate(report_jobs):
+        report_progress(progress, cancel_event, f"Report {num_job + 1}/{len(report_jobs)}", num_job / len(report_jobs))
+        job_measurements = None
+        if measurements is not None:
+            job_measurements = timed_stage(run_log, "Statistik", finish_measurements,
+                                           select_measurements(measurements, job[1], job[0].index.get_level_values("Datum")), report = os.path.basename(job[3]))
+        list_of_save_names.append(create_report_from_counts(*job, run_log = run_log, measurements = job_measurements))
+    return list_of_save_names
+
+def incremental_update(file_paths, save_path, period = "kw", progress = None, cancel_event = None, run_log = None, skip_files = None):
+    #daily update: only new or changed files are counted, the counts of all other files come from the manifest
+    #afterwards only the reports of the affected periods are created again from the merged counts
+    #skip_files: files that still exist but are not read now (e.g. still written), their stored counts are kept
+    #returns (list of saved files, list of (file, errormessage), number of counted files)
+    manifest_path = os.path.join(save_path, manifest_name)
+    store_path = os.path.join(save_path, measurement_store_name)
+    manifest = load_manifest(manifest_path)
+    file_entries = manifest["files"]
+    #a new or rebuilt manifest counts every file again, so nothing of the stored measurement parts is valid anymore
+    is_new_manifest = not file_entries
+    list_of_errors = []
+
+    #files are identified by path, a changed mtime or size means the file has to be counted again
+    current_files = {}
+    for file in file_paths:
+        stat = os.stat(file)
+        current_files[os.path.abspath(file)] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+    changed_files = [file for file, stat in current_files.items()
+                     if file not in file_entries or file_entries[file]["mtime_ns"] != stat["mtime_ns"] or file_entries[file]["size"] != stat["size"]]
+    skip_files = {os.path.abspath(file) for file in skip_files or []}
+    removed_files = [file for file in file_entries if file not in current_files and file not in skip_files]
+
+    #days of changed or removed files, their reports have to be created again
+    affected_days = set()
+    for file in changed_files + removed_files:
+        if file in file_entries:
+            affected_days.update((record[0], pd.Timestamp(record[2]).date()) for record in file_entries[file]["counts"])
+    for file in removed_files:
+        del file_entries[file]
+
+    #count only the new and changed files
+    file_cache_dir = cache_dir if use_cache else None
+    engine = resolve_read_engine()
+    start = time.perf_counter()
+    #the measurement parts are stored as well, so updated reports keep their statistics sheets
+    #the store is committed before the manifest is saved, parts of files missing in the manifest are replaced by the next update
+    store = open_measurement_store(store_path)
+    try:
+        with store:
+            if is_new_manifest:
+                clear_measurement_store(store)
+            delete_stored_measurements(store, changed_files + removed_files)
+            for num_done, (index, result, error) in enumerate(process_parallel(count_rawdata_file, changed_files, file_cache_dir, engine,
+                                                                               export_statistics), start = 1):
+                file = changed_files[index]
+                if error is None:
+                    file_counts, measurement_parts = result
+                    file_entries[file] = dict(current_files[file], counts = counts_to_records(file_counts))
+                    if measurement_parts is not None:
+                        store_measurements(store, file, measurement_parts)
+                    affected_days.update((door, day) for door, _, day, _, _ in file_counts.index)
+                else:
+                    #failed files are tried again with the next update
+                    file_entries.pop(file, None)
+                    list_of_errors.append((file, error))
+                report_progress(progress, cancel_event, f"Neue Datei {num_done}/{len(changed_files)} gezählt", num_done / max(len(changed_files), 1) / 2)
+    finally:
+        store.close()
+    log_stage(run_log, "Excel laden + Zählen", time.perf_counter() - start,
+              sum(count for file in changed_files if file in file_entries for *_, count in file_entries[file]["counts"]))
+    save_manifest(manifest_path, manifest)
+
+    if not affected_days or not file_entries:
+        return [], list_of_errors, len(changed_files)
+    #merge the stored counts of all files and create the affected reports again
+    counts = timed_stage(run_log, "Manifest zusammenführen", merge_manifest_counts, manifest, rows = lambda counts: int(counts.sum()))
+    measurement_parts = None
+    if export_statistics:
+        #only the measurements of the days of the affected reports are loaded, the update does not grow with the history
+        report_days = {(job[1], day) for job in select_period_jobs(counts, period, save_path, affected_days)
+                       for day in job[0].index.get_level_values("Datum")}
+        measurement_parts = timed_stage(run_log, "Statistik zusammenführen", load_stored_measurements, store_path, report_days,
+                                        rows = count_measurement_rows)
+    list_of_save_names = create_period_reports(counts, period, save_path, progress, cancel_event, affected_days, run_log, measurement_parts)
+    return list_of_save_names, list_of_errors, len(changed_files)
+
+def merge_manifest_counts(manifest):
+    #one table of all stored records is built at once, converting every file on its own is much slower
+    return merge_failure_counts([records_to_counts([record for entry in manifest["files"].values() for record in entry["counts"]])])
+
+def watch_folder(input_folder, output_folder, interval = 5, settle = 10, max_batch = None, stop_event = None, max_cycles = None):
+    #long running mode: polls input_folder and refreshes the cw reports in output_folder with incremental_update
+    #a file is only read once its own size and mtime did not change for settle seconds (the export may still be written)
+    #at most max_batch files are counted per update, so a flood of files is worked off batch by batch with bounded memory
+    max_batch = max_batch or 4 * (max_workers or os.cpu_count() or 1)
+    manifest = load_manifest(os.path.join(output_folder, manifest_name))
+    #files of a former run are already counted
+    handed_files = {file: (entry["size"], entry["mtime_ns"]) for file, entry in manifest["files"].items()}
+    failed_files = set()
+    seen_files = {}
+    num_cycles = 0
+    print(f"Überwache '{input_folder}' alle {interval} s, Reports in '{output_folder}' (Beenden mit Strg+C)")
+    while not (stop_event is not None and stop_event.is_set()) and (max_cycles is None or num_cycles < max_cycles):
+        num_cycles += 1
+        now = time.monotonic()
+        current_files = {}
+        for file in collect_xlsx_files(input_folder):
+            file = os.path.abspath(file)
+            try:
+                stat = os.stat(file)
+            except OSError:
+                #deleted in the meantime
+                continue
+            signature = (stat.st_size, stat.st_mtime_ns)
+            #(signature, time of the last change)
+            current_files[file] = seen_files[file] if file in seen_files and seen_files[file][0] == signature else (signature, now)
+        seen_files = current_files
+        #every file is ready on its own, a file that is written for a long time does not hold back the others
+        new_files = sorted(file for file, (signature, changed) in seen_files.items() if now - changed >= settle and handed_files.get(file) != signature)
+        if new_files:
+            batch = set(new_files[:max_batch])
+            #counted files keep their stored counts while they are rewritten or wait for the next batch, failed files are left out until they change
+            tracked_files = [file for file in seen_files if file in handed_files and file not in failed_files and file not in batch]
+            update_files = sorted(batch.union(file for file in tracked_files if handed_files[file] == seen_files[file][0]))
+            skip_files = [file for file in tracked_files if handed_files[file] != seen_files[file][0]]
+            list_of_save_names, list_of_errors, num_counted = run_logged(output_folder, "watch", incremental_update, update_files, output_folder, "kw",
+                                                                         skip_files = skip_files)
+            for file in batch:
+                handed_files[file] = seen_files[file][0]
+                failed_files.discard(file)
+            for file, error in list_of_errors:
+                failed_files.add(file)
+                print(f"❌ {file}: {error}")
+            print(f"{time.strftime('%H:%M:%S')} {num_counted} neue Datei(en), {len(new_files) - len(batch)} wartend, "
+                  f"{len(list_of_save_names)} Report(s) aktualisiert")
+            for door, robot, calendarweek, year, rate in get_failure_alerts(output_folder):
+                print(f"⚠ {door} {robot}: {rate:.2f} % Fehler in KW{calendarweek} {year} (Grenze {failure_limit} %)")
+            #remaining files of a flood are counted right away in the next cycle
+            if len(new_files) > len(batch):
+                continue
+        for file in list(handed_files):
+            if file not in seen_files:
+                del handed_files[file]
+        if stop_event is not None:
+            stop_event.wait(interval)
+        else:
+            time.sleep(interval)
+    return num_cycles
+
+def get_failure_alerts(output_folder):
+    #robots of the latest cw in the manifest with a failure rate above failure_limit
+    #returns a list of (Tür, Roboternummer, calendarweek, year, failure rate in %)
+    manifest = load_manifest(os.path.join(output_folder, manifest_name))
+    if not manifest["files"]:
+        return []
+    counts = merge_manifest_counts(manifest)
+    iso = pd.DatetimeIndex(counts.index.get_level_values("Datum")).isocalendar()
+    year_week = list(zip(iso["year"], iso["week"]))
+    latest_week = max(year_week)
+    counts = counts[[week == latest_week for week in year_week]]
+    is_failure = counts.index.get_level_values("Fehlernummer") != 0
+    df_rates = pd.DataFrame({
+        "Gesamt": counts.groupby(level = ["Tür", "Roboternummer"]).sum(),
+        "Fehler": counts[is_failure].groupby(level = ["Tür", "Roboternummer"]).sum()
+    }).fillna(0)
+    df_rates["Fehler in %"] = df_rates["Fehler"] / df_rates["Gesamt"] * 100
+    return [(door, robot, latest_week[1], latest_week[0], rate) for (door, robot), rate in df_rates["Fehler in %"].items() if rate > failure_limit]
+
+def get_manifest_schema():
+    #stored counts are only valid as long as the parsing and the variant routing stay the same,
+    #the stored measurement parts as long as the evaluated measurements and the histogram classes stay the same
+    return hashlib.sha256(json.dumps([manifest_version, cache_version, variant_routing, export_statistics, measurement_columns, nok_columns,
+                                      histogram_bin_widths], sort_keys = True).encode("utf-8")).hexdigest()
+
+def load_manifest(manifest_path):
+    #returns an empty manifest if there is none yet or if it was created with another schema
+    empty_manifest = {"schema": get_manifest_schema(), "files": {}}
+    if not os.path.exists(manifest_path):
+        return empty_manifest
+    try:
+        with open(manifest_path, "r", encoding = "utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Manifest '{manifest_path}' konnte nicht gelesen werden und wird neu aufgebaut: {e}")
+        return empty_manifest
+    if manifest.get("schema") != empty_manifest["schema"]:
+        return empty_manifest
+    return manifest
+
+def save_manifest(manifest_path, manifest):
+    #write into a temp file first, an aborted update must not destroy the manifest
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w", encoding = "utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, manifest_path)
+
+def counts_to_records(counts):
+    #count table (Tür, Variante, Datum, Roboternummer, Fehlernummer) into json serializable records
+    return [[str(door), str(variant), day.isoformat(), str(robot), int(error_num), int(count)]
+            for (door, variant, day, robot, error_num), count in counts.items()]
+
+def records_to_counts(records):
+    df_records = pd.DataFrame(records, columns = ["Tür", "Variante", "Datum", "Roboternummer", "Fehlernummer", "Anzahl"])
+    df_records["Datum"] = pd.to_datetime(df_records["Datum"]).dt.date
+    return df_records.set_index(["Tür", "Variante", "Datum", "Roboternummer", "Fehlernummer"])["Anzahl"]
+
+def create_history_aggregates(df_data, front_back):
+    #daily aggregates per robot, program number and error number in the column layout of the history database
+    group_keys = [df_data["Datum"].dt.normalize(), "Roboternummer", "Programmnummer", "Fehlernummer", assign_variant(df_data, front_back)]
+    df_aggregates = df_data.groupby(group_keys, observed = True, dropna = False).size().rename("Anzahl").reset_index()
+    #only rows without a variant are stored, rows with empty key cells do not fit into the database
+    df_aggregates = df_aggregates.dropna(subset = ["Datum", "Roboternummer", "Programmnummer", "Fehlernummer"])
+    df_aggregates["Datum"] = df_aggregates["Datum"].dt.strftime("%Y-%m-%d")
+    df_aggregates.insert(0, "Tür", front_back)
+    return df_aggregates[history_columns]
+
+def aggregate_rawdata_file(file, file_cache_dir = None, engine = "openpyxl"):
+    #worker function of the history import, only the daily aggregates leave the worker process
+    return create_history_aggregates(read_rawdata_file(file, file_cache_dir, engine), get_front_back(file))
+
+def merge_history_aggregates(list_of_aggregates):
+    #a robot-day can be split across several files, their aggregates are added up before the day is replaced in the database
+    df_aggregates = pd.concat(list_of_aggregates, ignore_index = True)
+    return df_aggregates.groupby(history_columns[:-1], observed = True, dropna = False, sort = False)["Anzahl"].sum().reset_index()
+
+def open_history_db(db_path):
+    #creates the tables and indexes on first use
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok = True)
+    connection = sqlite3.connect(db_path)
+    connection.executescript("""
+        CREATE TABLE IF NOT EXISTS failure_counts (
+            tuer TEXT NOT NULL,
+            datum TEXT NOT NULL,
+            roboternummer TEXT NOT NULL,
+            programmnummer INTEGER NOT NULL,
+            fehlernummer INTEGER NOT NULL,
+            variante TEXT,
+            anzahl INTEGER NOT NULL,
+            PRIMARY KEY (tuer, datum, roboternummer, programmnummer, fehlernummer)
+        );
+        CREATE INDEX IF NOT EXISTS idx_failure_counts_datum ON failure_counts (datum);
+        CREATE INDEX IF NOT EXISTS idx_failure_counts_roboternummer ON failure_counts (roboternummer, datum);
+        CREATE INDEX IF NOT EXISTS idx_failure_counts_programmnummer ON failure_counts (programmnummer, datum);
+        CREATE INDEX IF NOT EXISTS idx_failure_counts_fehlernummer ON failure_counts (fehlernummer, datum);
+    """)
+    return connection
+
+def write_history(db_path, df_aggregates):
+    #the aggregates of a robot-day have to be complete (see merge_history_aggregates), loading the day again replaces its stored aggregates
+    connection = open_history_db(db_path)
+    try:
+        with connection:
+            robot_days = df_aggregates[["Tür", "Roboternummer", "Datum"]].drop_duplicates().astype(str).itertuples(index = False)
+            connection.executemany("DELETE FROM failure_counts WHERE tuer = ? AND roboternummer = ? AND datum = ?", list(robot_days))
+            records = [(str(door), day, str(robot), int(program_num), int(error_num), None if pd.isna(variant_name) else str(variant_name), int(count))
+                       for door, day, robot, program_num, error_num, variant_name, count in df_aggregates.itertuples(index = False)]
+            connection.executemany("INSERT INTO failure_counts VALUES (?, ?, ?, ?, ?, ?, ?)", records)
+    finally:
+        connection.close()
+    return len(df_aggregates)
+
+def query_history(db_path, year, kw_from = None, kw_to = None, front_back = None, robot = None, program_num = None):
+    #daily aggregates of the calendar weeks kw_from to kw_to of year, the kw range is translated into a date range for the index
+    #all error numbers are returned, the screwings of a week are the base of every failure rate (see create_failure_rate_trend)
+    #raises ValueError for a kw range outside of the iso weeks of year
+    #28.12. is always in the last iso week of the year
+    num_weeks = datetime.date(year, 12, 28).isocalendar()[1]
+    kw_from = kw_from if kw_from is not None else 1
+    kw_to = kw_to if kw_to is not None else num_weeks
+    if not 1 <= kw_from <= kw_to <= num_weeks:
+        raise ValueError(f"Ungültiger KW-Bereich {kw_from} bis {kw_to}, {year} hat die Kalenderwochen 1 bis {num_weeks}")
+    conditions = ["datum BETWEEN ? AND ?"]
+    params = [datetime.date.fromisocalendar(year, kw_from, 1).isoformat(), datetime.date.fromisocalendar(year, kw_to, 7).isoformat()]
+    for column, value in [("tuer", front_back), ("roboternummer", robot), ("programmnummer", program_num)]:
+        if value is not None:
+            conditions.append(f"{column} = ?")
+            params.append(value)
+    connection = open_history_db(db_path)
+    try:
+        df_history = pd.read_sql_query("SELECT tuer, datum, roboternummer, programmnummer, fehlernummer, variante, anzahl FROM failure_counts "
+                                       f"WHERE {' AND '.join(conditions)} ORDER BY datum", connection, params = params)
+    finally:
+        connection.close()
+    df_history.columns = history_columns
+    df_history["Datum"] = pd.to_datetime(df_history["Datum"])
+    iso_calendar = df_history["Datum"].dt.isocalendar()
+    df_history.insert(2, "Jahr", iso_calendar["year"].astype("int16"))
+    df_history.insert(3, "KW", iso_calendar["week"].astype("int8"))
+    return df_history
+
+def create_failure_rate_trend(df_history, by = "Roboternummer", error_num = None):
+    #screwings, failures (Fehlernummer != 0 or only error_num) and failure rate per calendar week, door and robot (or any other column)
+    #both doors use the same robot names, so the door is always part of the group
+    #the screwings are always counted over all error numbers, so by = "Fehlernummer" and error_num give the share of the single error
+    group_keys = ["Jahr", "KW", "Tür"] + ([by] if by != "Tür" else [])
+    total_keys = [key for key in group_keys if key != "Fehlernummer"]
+    df_screwings = df_history.groupby(total_keys)["Anzahl"].sum().rename("Verschraubungen").reset_index()
+    is_failure = df_history["Fehlernummer"] != 0
+    if error_num is not None:
+        is_failure &= df_history["Fehlernummer"] == error_num
+    df_failures = df_history[is_failure].groupby(group_keys)["Anzahl"].sum().rename("Fehler").reset_index()
+    #weeks without failures keep a rate of 0, per error number only the occurred errors are listed
+    df_trend = df_screwings.merge(df_failures, on = total_keys, how = "inner" if by == "Fehlernummer" else "left")
+    df_trend["Fehler"] = df_trend["Fehler"].fillna(0).astype("int64")
+    df_trend = df_trend.set_index(group_keys).sort_index()
+    df_trend["Fehlerquote [%]"] = (df_trend["Fehler"] / df_trend["Verschraubungen"] * 100).round(2)
+    return df_trend
+
+def create_failure_counts(df_filtered, variants = None):
+    #shared aggregation stage, the plot and both sheets are derived from this single count table
+    #.groupby: group filtered dataframe into "Datum" (without timestamp), "Roboternummer", "Fehlernummer"
+    #and "Variante" in front if the variants of assign_variant are given, rows without variant are dropped
+    #.size(): vectorized count of the entrys in every group instead of a python callback per group
+    group_keys = [df_filtered["Datum"].dt.normalize(), "Roboternummer", "Fehlernummer"]
+    if variants is not None:
+        group_keys.insert(0, variants)
+    failure_counts = df_filtered.groupby(group_keys, observed = True).size()
     #set date without timestamps
-    df_failure["Datum"] = df_failure["Datum"].dt.date
+    date_level = failure_counts.index.names.index("Datum")
+    failure_counts.index = failure_counts.index.set_levels(failure_counts.index.levels[date_level].date, level = date_level)
+    return failure_counts
+
+def create_failure_pivot(failure_counts, average_label = "Ø Woche"):
+    #a variant without data in the period has no robot columns, create_failure_plot draws an empty plot for it
+    if failure_counts.empty:
+        return pd.DataFrame()
+    #mask of all counts with a failure (Fehlernummer != 0)
+    is_failure = failure_counts.index.get_level_values("Fehlernummer") != 0
 
+    #sum counts per "Datum", "Roboternummer" and calculate the "Fehleranteil in %" of all days seperately per robot
+    daily_total = failure_counts.groupby(level = ["Datum", "Roboternummer"]).sum()
+    daily_failed = failure_counts[is_failure].groupby(level = ["Datum", "Roboternummer"]).sum().reindex(daily_total.index, fill_value = 0)
     #pivot df into correct form
-    pivot_df = df_failure.pivot(index="Datum", columns="Roboternummer", values="Fehleranteil in %")
-
-    #calculate weekly failure
-    #1.         .groupby: "Roboternummer": all dates will be set together per robot 
-    #2.         .apply: lambda func that iterates through set groupby filters and calculates the "Fehler in %" value of the sum of all days per robot
-    #3.         .round(2): for better visualization
-    weekly_failure = (
-        df_filtered.groupby("Roboternummer")
-        .apply(lambda x: (x["Fehlernummer"] != 0).sum() / len(x) * 100)
-        .round(2)
-    )
+    pivot_df = (daily_failed / daily_total * 100).unstack("Roboternummer")
+
+    #calculate weekly failure: all dates will be set together per robot
+    #.round(2): for better visualization
+    weekly_total = daily_total.groupby(level = "Roboternummer").sum()
+    weekly_failed = daily_failed.groupby(level = "Roboternummer").sum()
+    weekly_failure = (weekly_failed / weekly_total * 100).round(2)
 
     #set data for plot df
-    pivot_df.loc["Ø Woche"] = weekly_failure
+    pivot_df.loc[average_label] = weekly_failure
+    return pivot_df
+
+def create_failure_plot(failure_counts, variant, front_back, period_title, average_label = "Ø Woche"):
+    pivot_df = create_failure_pivot(failure_counts, average_label)
+
+    #object oriented Agg figure, it is not registered in pyplot so it can be drawn off-screen in any thread
+    fig = Figure(figsize=(12, 6))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.set_title(f"Variante = {variant} {front_back}, {period_title}, Absoluter Fehleranteil in % pro Roboter")
+    #variants without data in the period get an empty plot
+    if pivot_df.empty:
+        ax.text(0.5, 0.5, "Keine Daten", ha="center", va="center", transform=ax.transAxes)
+        return fig
 
     #plot data
-    ax = pivot_df.plot(kind="bar", figsize=(12, 6))
-    plt.axhline(0.2, color='red', linestyle='--', linewidth = 2)
-    plt.ylabel("Fehleranteil in %")
-    plt.title(f"Variante = {variant} {front_back}, Kalenderwoche = {calendarweek}, Absoluter Fehleranteil in % pro Roboter")
-    plt.xticks(rotation=0)
-    plt.legend(title="Roboternummer", framealpha = 1)
+    pivot_df.plot(kind="bar", ax=ax)
+    ax.axhline(failure_limit, color='red', linestyle='--', linewidth = 2)
+    ax.set_ylabel("Fehleranteil in %")
+    ax.tick_params(axis="x", labelrotation=0)
+    ax.legend(title="Roboternummer", framealpha = 1)
 
     sep_index = len(pivot_df) - 2
-    plt.axvline(x=sep_index + 0.5, color="gray", linestyle="--", linewidth=1)
+    ax.axvline(x=sep_index + 0.5, color="gray", linestyle="--", linewidth=1)
 
-    plt.tight_layout()
-    fig = ax.figure
+    fig.tight_layout()
     return fig
 
-def create_detailed_dataframe(df_filtered):
-    #.groupby:group filtered dataframe into "Datum", "Roboternummer", "Fehlernummer"
-    #.size(): counts number of entrys i nevery group
-    #.unstack(): "Fehlernummer" will be changed to the different failure nums as a own col
-    df_grouped_detailed = df_filtered.groupby([df_filtered["Datum"].dt.date, "Roboternummer", "Fehlernummer"]).size().unstack(fill_value=0)
+def render_failure_plot(plot_job, dpi, image_format, create_plot = None):
+    #creates the figure of one variant and renders it into a RAM buffer
+    fig = (create_plot or create_failure_plot)(*plot_job)
+    #BytesIO that the image is buffered in the RAM rather than saved on the desktop
+    image_stream = BytesIO()
+    fig.savefig(image_stream, format=image_format, dpi=dpi, bbox_inches='tight')
+    #release the figure right away, only the rendered image is kept
+    fig.clear()
+    #reset RAM buffer
+    image_stream.seek(0)
+    return image_stream
+
+def render_failure_plots(list_of_plot_jobs, dpi = None, image_format = None, create_plot = None):
+    #renders the plots of all variants one after another, returns the image buffers in the order of list_of_plot_jobs
+    #create_plot(*plot_job) creates the figures, default create_failure_plot
+    #the agg rendering holds the GIL and matplotlib is not thread safe, several reports are rendered in parallel by the process pool of the cli
+    dpi = dpi or plot_dpi
+    image_format = image_format or plot_format
+    if image_format not in plot_formats:
+        raise ValueError(f"Unbekanntes Bildformat '{image_format}', erlaubt sind {', '.join(plot_formats)}")
+    return [render_failure_plot(plot_job, dpi, image_format, create_plot) for plot_job in list_of_plot_jobs]
+
+def create_measurements(df_data):
+    #statistics and histogram counts of the measurements of one report, returns (df_statistics, histogram_counts)
+    return finish_measurements(create_measurement_parts(df_data))
+
+def create_measurement_parts(df_data):
+    #mergeable parts of the statistics (df_sums, histogram_counts), parts of several files are added up by merge_measurement_parts
+    return create_measurement_sums(df_data), create_measurement_histograms(df_data)
+
+def get_measurement_values(df_data):
+    #numeric measurement columns as float64, NOK values only exist for failed screwings,
+    #all other values are evaluated for the OK screwings, the values of the other rows are set to NaN
+    is_failure = (df_data["Fehlernummer"] != 0).to_numpy()
+    #files with text in the measurement columns are not evaluated
+    return pd.DataFrame({col: np.where(is_failure if col in nok_columns else ~is_failure, df_data[col].to_numpy(dtype = "float64"), np.nan)
+                         for col in measurement_columns if pd.api.types.is_numeric_dtype(df_data[col])}, index = df_data.index)
+
+def create_measurement_sums(df_data):
+    #count, sum, sum of squares, min and max of every measurement per "Datum", "Roboternummer", "Programmnummer"
+    #one groupby over all measurement columns, NaN values are skipped by every aggregation
+    #index ("Messwert", "Datum", "Roboternummer", "Programmnummer")
+    df_values = get_measurement_values(df_data)
+    if df_values.empty or df_values.columns.empty:
+        return pd.DataFrame()
+    group_keys = [df_data["Datum"].dt.normalize(), df_data["Roboternummer"], df_data["Programmnummer"]]
+    df_sums = df_values.groupby(group_keys, observed = True).agg(["count", "sum", "min", "max"]).stack(level = 0)
+    df_sums["Quadratsumme"] = (df_values ** 2).groupby(group_keys, observed = True).sum().stack()
+    df_sums = df_sums.rename(columns = {"count": "Anzahl", "sum": "Summe", "min": "Min", "max": "Max"})
+    df_sums = df_sums[["Anzahl", "Summe", "Quadratsumme", "Min", "Max"]].astype({"Anzahl": "int64"})
+    #e.g. NOK values of a day without failures
+    df_sums = df_sums[df_sums["Anzahl"] > 0]
+    df_sums.index = df_sums.index.set_names("Messwert", level = 3).reorder_levels([3, 0, 1, 2])
+    #set date without timestamps
+    df_sums.index = df_sums.index.set_levels(df_sums.index.levels[1].date, level = "Datum")
+    return df_sums
+
+def create_measurement_histograms(df_data):
+    #counts per measurement, day, robot, program number and class, the class is value // histogram_bin_widths,
+    #so the histograms of files can be summed and the percentiles are taken from the summed histograms
+    df_values = get_measurement_values(df_data)
+    if df_values.empty or df_values.columns.empty:
+        return pd.Series(dtype = "int64")
+    df_classes = np.floor(df_values / pd.Series(histogram_bin_widths)[df_values.columns])
+    df_classes.index = pd.MultiIndex.from_arrays([df_data["Datum"].dt.normalize(), df_data["Roboternummer"], df_data["Programmnummer"]])
+    classes = df_classes.stack().dropna().astype("int64")
+    index = classes.index
+    histogram_counts = classes.groupby([index.get_level_values(3).rename("Messwert"), index.get_level_values(0), index.get_level_values(1),
+                                        index.get_level_values(2), classes.rename("Klasse")], observed = True).size()
+    histogram_counts.index = histogram_counts.index.set_levels(histogram_counts.index.levels[1].date, level = "Datum")
+    return histogram_counts
+
+def merge_measurement_parts(list_of_parts):
+    #adds up the parts of several files (with or without level "Tür"), equal entries are combined:
+    #counts, sums and histogram counts are added, min and max are taken over all parts, returns None without any measurement
+    list_of_sums = [df_sums for df_sums, _ in list_of_parts if not df_sums.empty]
+    list_of_histograms = [histogram_counts for _, histogram_counts in list_of_parts if not histogram_counts.empty]
+    if not list_of_sums:
+        return None
+    df_sums = pd.concat(list_of_sums)
+    df_sums = df_sums.groupby(level = list(range(df_sums.index.nlevels))).agg(
+        {"Anzahl": "sum", "Summe": "sum", "Quadratsumme": "sum", "Min": "min", "Max": "max"})
+    histogram_counts = pd.concat(list_of_histograms)
+    histogram_counts = histogram_counts.groupby(level = list(range(histogram_counts.index.nlevels))).sum()
+    return df_sums, histogram_counts
+
+def finish_measurements(measurement_parts):
+    #statistics with Cp/Cpk and histogram counts of one report out of the merged parts, returns (df_statistics, histogram_counts)
+    df_sums, histogram_counts = measurement_parts
+    return add_capability_indices(create_measurement_statistics(df_sums, histogram_counts)), histogram_counts
+
+def create_measurement_statistics(df_sums, histogram_counts):
+    #distribution of every measurement per "Messwert", "Datum", "Roboternummer", "Programmnummer"
+    #mean and standard deviation come from the sums, the percentiles are interpolated within the classes of the summed histograms,
+    #so they are exact up to one class width of histogram_bin_widths however the data was split into files
+    if df_sums.empty:
+        return pd.DataFrame()
+    num_values = df_sums["Anzahl"].astype("float64")
+    mean = df_sums["Summe"] / num_values
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        #sample standard deviation like pandas, rounding errors of the sums must not give a negative variance
+        variance = ((df_sums["Quadratsumme"] - df_sums["Summe"] * mean) / (num_values - 1)).clip(lower = 0)
+    variance[num_values < 2] = np.nan
+    df_statistics = pd.DataFrame({"Anzahl": num_values, "Mittelwert": mean, "Standardabweichung": np.sqrt(variance), "Min": df_sums["Min"]})
+    df_quantiles = get_histogram_quantiles(histogram_counts, statistic_quantiles)
+    df_quantiles = df_quantiles.reindex(df_statistics.index).clip(lower = df_sums["Min"], upper = df_sums["Max"], axis = 0)
+    df_statistics = pd.concat([df_statistics, df_quantiles], axis = 1)
+    df_statistics["Max"] = df_sums["Max"]
+    return df_statistics.astype("float64")
+
+def get_histogram_quantiles(histogram_counts, quantiles):
+    #quantiles of every histogram (all levels except "Klasse"), linear within the class that contains the quantile
+    histogram_counts = histogram_counts.sort_index()
+    grouped = histogram_counts.groupby(level = [level for level in histogram_counts.index.names if level != "Klasse"], sort = False)
+    counts = histogram_counts.to_numpy(dtype = "float64")
+    cum_counts = grouped.cumsum().to_numpy(dtype = "float64")
+    cum_before = cum_counts - counts
+    totals = grouped.transform("sum").to_numpy(dtype = "float64")
+    classes = histogram_counts.index.get_level_values("Klasse").to_numpy()
+    bin_widths = histogram_counts.index.get_level_values("Messwert").map(histogram_bin_widths).to_numpy(dtype = "float64")
+    group_index = histogram_counts.index.droplevel("Klasse")
+    df_quantiles = {}
+    for quantile in quantiles:
+        target = quantile * totals
+        #exactly one class of every histogram contains the quantile
+        is_quantile_class = (cum_before < target) & (cum_counts >= target)
+        values = (classes + (target - cum_before) / counts) * bin_widths
+        df_quantiles[f"P{round(quantile * 100)}"] = pd.Series(values[is_quantile_class], index = group_index[is_quantile_class])
+    return pd.DataFrame(df_quantiles)
+
+def add_capability_indices(df_statistics, limits = None):
+    #Cp and Cpk of every row against the tolerance limits of the measurement and program number (see measurement_limits)
+    #Cp needs both limits, Cpk is one-sided with only one limit
+    limits = measurement_limits if limits is None else limits
+    df_statistics = df_statistics.copy()
+    if df_statistics.empty:
+        return df_statistics
+    row_limits = [limits.get(col, {}).get(str(program_num), limits.get(col, {}).get("*", [None, None]))
+                  for col, _, _, program_num in df_statistics.index]
+    lower = np.array([np.nan if limit[0] is None else limit[0] for limit in row_limits], dtype = "float64")
+    upper = np.array([np.nan if limit[1] is None else limit[1] for limit in row_limits], dtype = "float64")
+    mean = df_statistics["Mittelwert"].to_numpy()
+    std = df_statistics["Standardabweichung"].to_numpy()
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        df_statistics["UGW"] = lower
+        df_statistics["OGW"] = upper
+        df_statistics["Cp"] = (upper - lower) / (6 * std)
+        df_statistics["Cpk"] = np.fmin((upper - mean) / (3 * std), (mean - lower) / (3 * std))
+    #a standard deviation of 0 (single screwing) gives no meaningful index
+    df_statistics[["Cp", "Cpk"]] = df_statistics[["Cp", "Cpk"]].replace([np.inf, -np.inf], np.nan)
+    return df_statistics
+
+def add_door_level(measurement_parts, front_back):
+    #adds the level "Tür" in front of both parts, empty parts stay empty
+    return tuple(part if part.empty else pd.concat([part], keys = [front_back], names = ["Tür"]) for part in measurement_parts)
+
+def select_measurements(measurement_parts, front_back, days):
+    #parts of one door and the days of one report out of the merged parts with level "Tür"
+    days = set(pd.DatetimeIndex(days).date)
+    list_of_selected = []
+    for part in measurement_parts:
+        if front_back not in part.index.unique("Tür"):
+            list_of_selected.append(part.iloc[:0].droplevel("Tür"))
+            continue
+        part = part.xs(front_back, level = "Tür")
+        list_of_selected.append(part[part.index.get_level_values("Datum").isin(days)])
+    return tuple(list_of_selected)
+
+def open_measurement_store(store_path):
+    #measurement parts of every counted file of the incremental update, creates the tables and indexes on first use
+    connection = sqlite3.connect(store_path)
+    connection.executescript("""
+        CREATE TABLE IF NOT EXISTS measurement_sums (
+            datei TEXT NOT NULL,
+            tuer TEXT NOT NULL,
+            messwert TEXT NOT NULL,
+            datum TEXT NOT NULL,
+            roboternummer TEXT NOT NULL,
+            programmnummer INTEGER NOT NULL,
+            anzahl INTEGER NOT NULL,
+            summe REAL NOT NULL,
+            quadratsumme REAL NOT NULL,
+            wert_min REAL NOT NULL,
+            wert_max REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS measurement_histograms (
+            datei TEXT NOT NULL,
+            tuer TEXT NOT NULL,
+            messwert TEXT NOT NULL,
+            datum TEXT NOT NULL,
+            roboternummer TEXT NOT NULL,
+            programmnummer INTEGER NOT NULL,
+            klasse INTEGER NOT NULL,
+            anzahl INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_measurement_sums_datei ON measurement_sums (datei);
+        CREATE INDEX IF NOT EXISTS idx_measurement_sums_datum ON measurement_sums (tuer, datum);
+        CREATE INDEX IF NOT EXISTS idx_measurement_histograms_datei ON measurement_histograms (datei);
+        CREATE INDEX IF NOT EXISTS idx_measurement_histograms_datum ON measurement_histograms (tuer, datum);
+    """)
+    return connection
+
+def clear_measurement_store(connection):
+    connection.execute("DELETE FROM measurement_sums")
+    connection.execute("DELETE FROM measurement_histograms")
+
+def delete_stored_measurements(connection, files):
+    #parts of changed and removed files, changed files are stored again after counting
+    connection.executemany("DELETE FROM measurement_sums WHERE datei = ?", [(file,) for file in files])
+    connection.executemany("DELETE FROM measurement_histograms WHERE datei = ?", [(file,) for file in files])
+
+def store_measurements(connection, file, measurement_parts):
+    #parts with level "Tür" of one file
+    df_sums, histogram_counts = measurement_parts
+    sum_records = [(file, str(door), str(col), day.isoformat(), str(robot), int(program_num), int(num_values), float(total), float(square_total),
+                    float(value_min), float(value_max))
+                   for (door, col, day, robot, program_num), (num_values, total, square_total, value_min, value_max)
+                   in zip(df_sums.index, df_sums.itertuples(index = False, name = None))]
+    histogram_records = [(file, str(door), str(col), day.isoformat(), str(robot), int(program_num), int(num_class), int(count))
+                         for (door, col, day, robot, program_num, num_class), count in histogram_counts.items()]
+    connection.executemany("INSERT INTO measurement_sums VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", sum_records)
+    connection.executemany("INSERT INTO measurement_histograms VALUES (?, ?, ?, ?, ?, ?, ?, ?)", histogram_records)
+
+def load_stored_measurements(store_path, report_days):
+    #merged parts with level "Tür" of the set of (Tür, Datum), entries of the same robot and day in several files are combined by the database
+    #returns None without any stored measurements
+    sum_levels = ["Tür", "Messwert", "Datum", "Roboternummer", "Programmnummer"]
+    group_columns = "s.tuer, s.messwert, s.datum, s.roboternummer, s.programmnummer"
+    connection = open_measurement_store(store_path)
+    try:
+        connection.execute("CREATE TEMP TABLE report_days (tuer TEXT NOT NULL, datum TEXT NOT NULL)")
+        connection.executemany("INSERT INTO report_days VALUES (?, ?)", [(door, pd.Timestamp(day).strftime("%Y-%m-%d")) for door, day in report_days])
+        df_sums = pd.read_sql_query(f"SELECT {group_columns}, SUM(s.anzahl), SUM(s.summe), SUM(s.quadratsumme), MIN(s.wert_min), MAX(s.wert_max) "
+                                    "FROM measurement_sums s JOIN report_days d ON s.tuer = d.tuer AND s.datum = d.datum "
+                                    f"GROUP BY {group_columns} ORDER BY {group_columns}", connection)
+        df_histograms = pd.read_sql_query(f"SELECT {group_columns}, s.klasse, SUM(s.anzahl) "
+                                          "FROM measurement_histograms s JOIN report_days d ON s.tuer = d.tuer AND s.datum = d.datum "
+                                          f"GROUP BY {group_columns}, s.klasse ORDER BY {group_columns}, s.klasse", connection)
+    finally:
+        connection.close()
+    if df_sums.empty:
+        return None
+    df_sums.columns = sum_levels + ["Anzahl", "Summe", "Quadratsumme", "Min", "Max"]
+    df_sums["Datum"] = pd.to_datetime(df_sums["Datum"]).dt.date
+    df_histograms.columns = sum_levels + ["Klasse", "Anzahl"]
+    df_histograms["Datum"] = pd.to_datetime(df_histograms["Datum"]).dt.date
+    return df_sums.set_index(sum_levels), df_histograms.set_index(sum_levels + ["Klasse"])["Anzahl"]
+
+def count_measurement_rows(measurement_parts):
+    #evaluated measurements of the merged parts
+    return int(measurement_parts[0]["Anzahl"].sum()) if measurement_parts is not None else 0
+
+def prepare_statistics(measurements, front_back, period_title):
+    #one statistics sheet and one histogram job per measurement, returns (list of (sheet_name, df), list of plot jobs)
+    df_statistics, histogram_counts = measurements
+    list_of_sheets = []
+    list_of_histogram_jobs = []
+    if df_statistics.empty:
+        return list_of_sheets, list_of_histogram_jobs
+    for col in measurement_columns:
+        if col not in df_statistics.index.unique("Messwert"):
+            continue
+        list_of_sheets.append((f"Statistik {col}", df_statistics.xs(col, level = "Messwert").sort_index().round(3)))
+        col_counts = histogram_counts.xs(col, level = "Messwert") if col in histogram_counts.index.unique("Messwert") else histogram_counts.iloc[:0]
+        #only limits valid for all programs of the report are drawn, they are taken from the table so worker processes draw them too
+        col_limits = df_statistics.xs(col, level = "Messwert")[["UGW", "OGW"]].drop_duplicates().dropna(how = "all")
+        limits = [limit for limit in col_limits.iloc[0] if pd.notna(limit)] if len(col_limits) == 1 else []
+        list_of_histogram_jobs.append((col_counts, col, limits, front_back, period_title))
+    return list_of_sheets, list_of_histogram_jobs
+
+def create_histogram_plot(histogram_counts, col, limits, front_back, period_title):
+    #distribution of one measurement per robot over all days of the report, the limits are drawn as lines
+    fig = Figure(figsize=(12, 6))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.set_title(f"{col} {front_back}, {period_title}, Verteilung pro Roboter")
+    if histogram_counts.empty:
+        ax.text(0.5, 0.5, "Keine Daten", ha="center", va="center", transform=ax.transAxes)
+        return fig
+    robot_counts = histogram_counts.groupby(level = ["Roboternummer", "Klasse"]).sum()
+    bin_width = histogram_bin_widths[col]
+    for robot in robot_counts.index.unique("Roboternummer"):
+        counts = robot_counts.xs(robot, level = "Roboternummer").sort_index()
+        ax.step((counts.index.to_numpy() + 0.5) * bin_width, counts.to_numpy(), where = "mid", label = robot)
+    for limit in limits:
+        ax.axvline(limit, color='red', linestyle='--', linewidth = 2)
+    ax.set_xlabel(col)
+    ax.set_ylabel("Anzahl")
+    ax.legend(title="Roboternummer", framealpha = 1)
+    fig.tight_layout()
+    return fig
+
+def create_detailed_dataframe(failure_counts):
+    #.unstack(): "Fehlernummer" of the shared count table will be changed to the different failure nums as a own col
+    df_grouped_detailed = failure_counts.unstack(fill_value=0)
     #sum num of all entrys of axis 1
     df_grouped_detailed["Gesamtverschraubungen"] = df_grouped_detailed.sum(axis=1)
     #get all the cols with failures except 0 and "Gesamtverschraubungen"
@@ -259,11 +1673,10 @@ def create_detailed_dataframe(df_filtered):
     df_grouped_detailed["Fehler in %"] = (df_grouped_detailed[fail_cols].sum(axis=1) / df_grouped_detailed["Gesamtverschraubungen"] * 100).round(2)
     return df_grouped_detailed
 
-def create_detailed_dataframe_weekly(df_filtered):
-    #.groupby:group filtered dataframe into "Roboternummer", "Fehlernummer"
-    #.size(): counts number of entrys i nevery group
+def create_detailed_dataframe_weekly(failure_counts):
+    #.groupby: sum the daily counts of the shared count table per "Roboternummer", "Fehlernummer"
     #.unstack(): "Fehlernummer" will be changed to the different failure nums as a own col
-    df_grouped_detailed_weekly = df_filtered.groupby(["Roboternummer", "Fehlernummer"]).size().unstack(fill_value=0)
+    df_grouped_detailed_weekly = failure_counts.groupby(level = ["Roboternummer", "Fehlernummer"]).sum().unstack(fill_value=0)
     #sum num of all entrys of axis 1
     df_grouped_detailed_weekly["Gesamtverschraubungen"] = df_grouped_detailed_weekly.sum(axis=1)
     #get all the cols with failures except 0 and "Gesamtverschraubungen"
@@ -272,118 +1685,706 @@ def create_detailed_dataframe_weekly(df_filtered):
     df_grouped_detailed_weekly["Fehler in %"] = (df_grouped_detailed_weekly[fail_cols].sum(axis=1) / df_grouped_detailed_weekly["Gesamtverschraubungen"] * 100).round(2)
     return df_grouped_detailed_weekly
 
-def create_export(list_of_df_daily, list_of_df_weekly, list_of_plots):
+def create_export(list_of_df_daily, list_of_df_weekly, list_of_images, save_name, summary_name = "weekly", list_of_extra_sheets = None,
+                  list_of_extra_images = None):
+    #writes the report with xlsxwriter in constant_memory mode, every row is flushed to disk right after it was written
+    #so the memory stays flat regardless of the number and size of the sheets
+    #list_of_extra_sheets: additional (sheet_name, df) written after the sheets of the variants, e.g. one per cw
+    #list_of_extra_images: (sheet_name, image_stream) of extra sheets, placed to the right of the table
     #set sheet_names
-    sheet_names_weekly = ["B10 weekly", "C9 weekly"]
-    sheet_names_daily = ["B10 daily", "C9 daily"]
-    
-    #isolate data from lists
-    df_daily_b10 = list_of_df_daily[0]
-    df_daily_c9 = list_of_df_daily[1]
-    df_weekly_b10 = list_of_df_weekly[0]
-    df_weekly_c9 = list_of_df_weekly[1]
-    
-    #select save name for the file with correct path settings
-    save_name = f"{save_path}/Schraubreport_{front_back}_KW{calendarweek}_{year}.xlsx"
-    #start ExcelWriter engine
-    with pd.ExcelWriter(save_name) as writer:
-        df_daily_b10.to_excel(writer, sheet_name = sheet_names_daily[0])
-        df_weekly_b10.to_excel(writer, sheet_name = sheet_names_weekly[0])
-        df_daily_c9.to_excel(writer, sheet_name = sheet_names_daily[1])
-        df_weekly_c9.to_excel(writer, sheet_name = sheet_names_weekly[1])
+    sheet_names_weekly = [f"{variant} {summary_name}" for variant in list_of_variants]
+    sheet_names_daily = [f"{variant} daily" for variant in list_of_variants]
 
+    workbook = xlsxwriter.Workbook(save_name, {"constant_memory": True})
+    try:
         #format seetings for failure percent coloring
-        workbook = writer.book
-        green_format = workbook.add_format({'bg_color': '#C6EFCE', 'font_color': '#006100'})
-        red_format = workbook.add_format({'bg_color': '#FFC7CE', 'font_color': '#9C0006'})
-        yellow_format = workbook.add_format({'bg_color': '#FFEB9C', 'font_color': '#9C6500'})
-
-        #loop aggregation for coloring cells in col "Fehler in %" weekly
-        for sheet_name, df in zip(sheet_names_weekly, list_of_df_weekly):
-            worksheet = writer.sheets[sheet_name]  
-            try:
-                #code snippet created with AI
-                col_index = df.columns.get_loc("Fehler in %")  
-                excel_col_letter = chr(ord('A') + col_index + 1)   
-                cell_range = f"{excel_col_letter}2:{excel_col_letter}6"
-                worksheet.conditional_format(cell_range, {
-                    'type': 'cell',
-                    'criteria': '>=',
-                    'value': 0.5,
-                    'format': red_format
-                })
-                worksheet.conditional_format(cell_range, {
-                    'type': 'cell',
-                    'criteria': 'between',
-                    'minimum': 0.2001,
-                    'maximum': 0.4999,
-                    'format': yellow_format
-                })
-                worksheet.conditional_format(cell_range, {
-                    'type': 'cell',
-                    'criteria': '<=',
-                    'value': 0.2,
-                    'format': green_format
-                })
-            except KeyError:
-                print(f"Spalte 'Fehler in %' nicht gefunden in {sheet_name}")
-            
-        #loop aggregation for coloring cells in col "Fehler in %" daily
-        for sheet_name, df in zip(sheet_names_daily, list_of_df_daily):
-            worksheet = writer.sheets[sheet_name]
-                
-            try:
-                #code snippet created with AI
-                col_index = df.columns.get_loc("Fehler in %")  
-                excel_col_letter = chr(ord('A') + col_index + 2)   
-                row_start = 2
-                row_end = len(df) + 1
-                cell_range = f"{excel_col_letter}{row_start}:{excel_col_letter}{row_end}"
-                worksheet.conditional_format(cell_range, {
-                    'type': 'cell',
-                    'criteria': '>=',
-                    'value': 0.5,
-                    'format': red_format
-                })
-                worksheet.conditional_format(cell_range, {
-                    'type': 'cell',
-                    'criteria': 'between',
-                    'minimum': 0.2001,
-                    'maximum': 0.4999,
-                    'format': yellow_format
-                })
-                worksheet.conditional_format(cell_range, {
-                    'type': 'cell',
-                    'criteria': '<=',
-                    'value': 0.2,
-                    'format': green_format
-                })
-            except KeyError:
-                print(f"Spalte 'Fehler in %' nicht gefunden in {sheet_name}")   
-        #set target cells to save plot into the excel       
-        target_cells_plot = ["A7", "A7"]  
-        for fig, sheet, cell in zip(list_of_plots, sheet_names_weekly, target_cells_plot):
-            #BytesIO that the image is buffered in the RAM rather than saved on the desktop
-            image_stream = BytesIO()
-            fig.savefig(image_stream, format='png', dpi=300, bbox_inches='tight')
-            #reset RAM buffer
-            image_stream.seek(0)
-
-            #insert fig into selected worksheet
-            worksheet = writer.sheets[sheet]
-            worksheet.insert_image(cell, "", {
+        formats = {
+            "date": workbook.add_format({"num_format": "yyyy-mm-dd"}),
+            "green": workbook.add_format({'bg_color': '#C6EFCE', 'font_color': '#006100'}),
+            "red": workbook.add_format({'bg_color': '#FFC7CE', 'font_color': '#9C0006'}),
+            "yellow": workbook.add_format({'bg_color': '#FFEB9C', 'font_color': '#9C6500'})
+        }
+        #sheet order: daily and summary sheet of every variant, then the extra sheets
+        list_of_sheets = []
+        for sheet_daily, df_daily, sheet_weekly, df_weekly in zip(sheet_names_daily, list_of_df_daily, sheet_names_weekly, list_of_df_weekly):
+            list_of_sheets += [(sheet_daily, df_daily), (sheet_weekly, df_weekly)]
+        list_of_sheets += list_of_extra_sheets or []
+        worksheets = {sheet_name: write_sheet(workbook, sheet_name, df, formats) for sheet_name, df in list_of_sheets}
+
+        #the plot is placed below the summary table
+        for image_stream, sheet_name, df_weekly in zip(list_of_images, sheet_names_weekly, list_of_df_weekly):
+            #insert the rendered plot into selected worksheet
+            worksheets[sheet_name].insert_image(xl_rowcol_to_cell(len(df_weekly) + 1, 0), "", {
+                "image_data": image_stream,
+                "x_offset": 5,
+                "y_offset": 5,
+                "x_scale": 0.5,
+                "y_scale": 0.5
+            })
+        extra_sheets = dict(list_of_extra_sheets or [])
+        for sheet_name, image_stream in list_of_extra_images or []:
+            df_extra = extra_sheets[sheet_name]
+            worksheets[sheet_name].insert_image(xl_rowcol_to_cell(0, df_extra.index.nlevels + len(df_extra.columns) + 1), "", {
                 "image_data": image_stream,
                 "x_offset": 5,
                 "y_offset": 5,
                 "x_scale": 0.5,
                 "y_scale": 0.5
             })
-            
+    finally:
+        workbook.close()
+
+def write_sheet(workbook, sheet_name, df, formats):
+    #writes df row by row in the layout of DataFrame.to_excel: header row, index columns (outer levels merged), data columns
+    #the conditional format of "Fehler in %" covers exactly the data rows, the columns are addressed by xl_range
+    worksheet = workbook.add_worksheet(sheet_name)
+    num_levels = df.index.nlevels
+    for col, label in enumerate(list(df.index.names) + list(df.columns)):
+        if label is not None:
+            worksheet.write(0, col, label)
+    index_values = [df.index.get_level_values(level) for level in range(num_levels)]
+    #length of the runs of equal values of the outer index levels, they are merged like in to_excel
+    run_lengths = [get_run_lengths(index_values[:level + 1]) for level in range(num_levels - 1)]
+    for num_row, values in enumerate(df.itertuples(index = False, name = None)):
+        row = num_row + 1
+        for level in range(num_levels):
+            if level < num_levels - 1:
+                run_length = run_lengths[level][num_row]
+                #0 = row within a run that is already merged
+                if run_length == 0:
+                    continue
+                if run_length > 1:
+                    #without a format no blank cells are written into the following rows, they are not written yet
+                    worksheet.merge_range(row, level, row + run_length - 1, level, None)
+            write_cell(worksheet, row, level, index_values[level][num_row], formats)
+        for col, value in enumerate(values, start = num_levels):
+            write_cell(worksheet, row, col, value, formats)
+
+    if "Fehler in %" in df.columns and len(df) > 0:
+        col = num_levels + df.columns.get_loc("Fehler in %")
+        cell_range = xl_range(1, col, len(df), col)
+        worksheet.conditional_format(cell_range, {
+            'type': 'cell',
+            'criteria': '>=',
+            'value': 0.5,
+            'format': formats["red"]
+        })
+        worksheet.conditional_format(cell_range, {
+            'type': 'cell',
+            'criteria': 'between',
+            'minimum': failure_limit + 0.0001,
+            'maximum': 0.4999,
+            'format': formats["yellow"]
+        })
+        worksheet.conditional_format(cell_range, {
+            'type': 'cell',
+            'criteria': '<=',
+            'value': failure_limit,
+            'format': formats["green"]
+        })
+    #process capability of the statistics sheets: below 1.0 red, below 1.33 yellow, else green
+    #empty cells (no limits or a single value without standard deviation) are treated as 0 by excel, so only numbers are colored
+    if "Cpk" in df.columns and df["Cpk"].notna().any():
+        col = num_levels + df.columns.get_loc("Cpk")
+        cell_range = xl_range(1, col, len(df), col)
+        cell = xl_rowcol_to_cell(1, col)
+        worksheet.conditional_format(cell_range, {
+            'type': 'formula',
+            'criteria': f'=AND(ISNUMBER({cell}),{cell}<1)',
+            'format': formats["red"]
+        })
+        worksheet.conditional_format(cell_range, {
+            'type': 'formula',
+            'criteria': f'=AND(ISNUMBER({cell}),{cell}>=1,{cell}<1.33)',
+            'format': formats["yellow"]
+        })
+        worksheet.conditional_format(cell_range, {
+            'type': 'formula',
+            'criteria': f'=AND(ISNUMBER({cell}),{cell}>=1.33)',
+            'format': formats["green"]
+        })
+    return worksheet
+
+def get_run_lengths(list_of_levels):
+    #for every row the number of following rows with the same values in all given levels, 0 inside a run
+    run_lengths = [0] * len(list_of_levels[0])
+    run_start = 0
+    for num_row in range(1, len(run_lengths) + 1):
+        if num_row == len(run_lengths) or any(level[num_row] != level[run_start] for level in list_of_levels):
+            run_lengths[run_start] = num_row - run_start
+            run_start = num_row
+    return run_lengths
+
+def write_cell(worksheet, row, col, value, formats):
+    #numpy values are converted to python values, missing values stay empty
+    if isinstance(value, (datetime.date, pd.Timestamp)):
+        worksheet.write_datetime(row, col, pd.Timestamp(value).to_pydatetime(), formats["date"])
+    elif pd.isna(value):
+        return
+    elif isinstance(value, (np.integer, np.floating)):
+        worksheet.write_number(row, col, value.item())
+    else:
+        worksheet.write(row, col, value)
+
+def run_in_background(task, on_success):
+    #runs task(progress, cancel_event) on a worker thread so the window stays responsive
+    #on_success(result) and all messageboxes are executed in the Tk main loop by poll_gui_queue
+    global worker_thread
+    global cancel_event
+    if worker_thread is not None and worker_thread.is_alive():
+        messagebox.showwarning("Bitte warten", "Es läuft bereits eine Auswertung.")
+        return
+    cancel_event = threading.Event()
+    set_busy(True)
+
+    def progress(text, fraction = None):
+        gui_queue.put(("progress", text, fraction))
+
+    def worker(cancel_event):
+        try:
+            result = task(progress, cancel_event)
+            gui_queue.put(("done", on_success, result))
+        except CancelledByUser:
+            gui_queue.put(("cancelled", None, None))
+        except Exception as e:
+            gui_queue.put(("error", None, e))
+
+    worker_thread = threading.Thread(target = worker, args = (cancel_event,), daemon = True)
+    worker_thread.start()
+
+def poll_gui_queue():
+    #marshals progress and results of the worker thread into the Tk main loop
+    try:
+        while True:
+            kind, payload, value = gui_queue.get_nowait()
+            if kind == "progress":
+                lbl_status.config(text = payload)
+                if value is not None:
+                    progress_bar["value"] = value * 100
+            elif kind == "done":
+                #the worker is finished after its last message, so on_success may already start the next task
+                worker_thread.join()
+                set_busy(False)
+                lbl_status.config(text = "Fertig")
+                payload(value)
+            elif kind == "cancelled":
+                set_busy(False)
+                lbl_status.config(text = "Abgebrochen")
+                messagebox.showinfo("Abgebrochen", "Der Vorgang wurde abgebrochen.")
+            elif kind == "error":
+                set_busy(False)
+                lbl_status.config(text = "Fehler")
+                messagebox.showerror("Fehler", f"❌ Der Vorgang ist fehlgeschlagen: {value}")
+    except queue.Empty:
+        pass
+    root.after(100, poll_gui_queue)
+
+def update_reports():
+    #daily update of the reports in save_path, only new or changed files of the selection are read
+    if len(file_paths) == 0 or not save_path:
+        messagebox.showerror("Ungültige Angabe", "Es wurden nicht alle Parameter korrekt gesetzt um den Prozess zu starten.")
+        return
+    run_in_background(lambda progress, cancel_event: run_logged(save_path, "update", incremental_update, file_paths, save_path, period, progress, cancel_event),
+                      finish_update_reports)
+
+def finish_update_reports(result):
+    list_of_save_names, list_of_errors, num_counted = result
+    if list_of_errors:
+        failed_files = "\n".join(f"{os.path.basename(file)}: {error}" for file, error in list_of_errors)
+        messagebox.showwarning("Fehler beim Laden", f"❌ {len(list_of_errors)} Datei(en) konnten nicht verarbeitet werden und werden ignoriert:\n{failed_files}")
+    messagebox.showinfo("Update erfolgreich", f"{num_counted} neue oder geänderte Datei(en) ausgewertet, {len(list_of_save_names)} Report(s) aktualisiert.")
+
+def select_period(event = None):
+    global period
+    global df
+    global calendarweek
+    global variant_counts_stream
+    global measurements_stream
+    new_period = period_names[cmb_period.get()]
+    #the rawdata of one cw and the count tables of the streaming mode are only valid for the mode they were loaded in,
+    #after switching between both modes the data has to be loaded again, otherwise a former selection would be exported
+    if (new_period == "kw") != (period == "kw"):
+        df = 0
+        calendarweek = 0
+        variant_counts_stream = None
+        measurements_stream = None
+        lbl_status.config(text = "Zeitraum geändert, bitte Daten neu laden")
+    period = new_period
+
+def set_busy(busy):
+    #lock the buttons while a worker is running, only cancel stays active
+    state = "disabled" if busy else "normal"
+    for button in [btn_load_xlsx, btn_submit_xlsx, btn_select_path, btn_export, btn_update]:
+        button.config(state = state)
+    cmb_period.config(state = "disabled" if busy else "readonly")
+    btn_cancel.config(state = "normal" if busy else "disabled")
+    progress_bar["value"] = 0
+
+def cancel_background_task():
+    if cancel_event is not None:
+        cancel_event.set()
+        lbl_status.config(text = "Wird abgebrochen...")
+
+def write_synthetic_export(path, n_rows, day, rob_num = "Rob_8_1", seed = 0):
+    #writes a synthetic robot export with the 20 column layout and header row of the real rawdata files
+    rng = np.random.default_rng(seed)
+    program_numbers = [5, 15, 25, 105, 115, 120, 130] if rob_num == "Rob_8_2" else [101, 102, 105, 111, 115, 120]
+    df_export = pd.DataFrame({
+        "Datum": pd.Timestamp(day),
+        "Uhrzeit": (pd.Timestamp(day) + pd.to_timedelta(np.sort(rng.integers(0, 86400, n_rows)), unit = "s")).strftime("%H:%M:%S"),
+        "Programmnummer": rng.choice(program_numbers, n_rows),
+        "Fehlernummer": np.where(rng.random(n_rows) < 0.003, rng.choice([3, 7, 12, 21, 33], n_rows), 0),
+        "Gesamtlaufzeit": rng.normal(2.5, 0.2, n_rows).round(3)
+    })
+    for num in range(5, 14):
+        df_export[f"Info {num}"] = rng.integers(0, 100, n_rows)
+    df_export["Schritt 3"] = 3
+    df_export["Drehmoment 3"] = rng.normal(12.0, 0.3, n_rows).round(2)
+    df_export["Drehwinkel 3"] = rng.normal(720, 25, n_rows).round(1)
+    df_export["Schritt NOK"] = np.where(df_export["Fehlernummer"] != 0, rng.integers(1, 4, n_rows), 0)
+    df_export["Drehmoment NOK"] = np.where(df_export["Fehlernummer"] != 0, rng.normal(8.0, 2.0, n_rows).round(2), 0.0)
+    df_export["Drehwinkel NOK"] = np.where(df_export["Fehlernummer"] != 0, rng.normal(400, 120, n_rows).round(1), 0.0)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok = True)
+    df_export.to_excel(path, index = False, engine = "xlsxwriter")
+    return path
+
+def write_synthetic_tree(root, n_days, n_rows, start_day = "2025-01-06", doors = None, robots = None):
+    #folder tree like on the line: root/<Tür>/<Rob_x_y>/<Rob_x_y>_<Datum>.xlsx with one file per robot and working day
+    #existing files are kept, so the same tree can be reused to compare two builds
+    doors = doors or list(variant_routing)
+    robots = robots or rob_nums
+    days = pd.bdate_range(start_day, periods = n_days)
+    for door_index, door in enumerate(doors):
+        for rob_index, rob_num in enumerate(robots):
+            for day_index, day in enumerate(days):
+                path = os.path.join(root, door, rob_num, f"{rob_num}_{day:%Y-%m-%d}.xlsx")
+                if not os.path.exists(path):
+                    seed = (door_index * len(robots) + rob_index) * 10000 + day_index
+                    write_synthetic_export(path, n_rows, day, rob_num, seed)
+    return root
+
+def benchmark_pipeline(list_of_days = None, n_rows = 2000, repeats = 1, data_dir = None, parallel = False, csv_path = None):
+    #times every stage of the GUI pipeline separately for data sizes from one day to a quarter (65 working days), for both doors
+    #tracemalloc slows down the python heavy stages several times, so the peak memory is measured in an extra run after the timed runs
+    #with parallel loading the worker processes are not included in the memory
+    list_of_days = list_of_days or [1, 5, 20, 65]
+    stages = ["Ordner durchsuchen", "Excel laden", "Datenstruktur", "KW-Prüfung", "Aggregation", "Statistik", "Tabellen", "Diagramme", "Histogramme",
+              "Excel-Export"]
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = data_dir or tmp_dir
+        for n_days in list_of_days:
+            tree_dir = os.path.join(data_dir, f"{n_days}_Tage_{n_rows}_Zeilen")
+            print(f"Erzeuge bzw. verwende synthetische Daten: {n_days} Tag(e), {n_rows:,} Zeilen pro Datei...")
+            write_synthetic_tree(tree_dir, n_days, n_rows)
+            export_path = os.path.join(tmp_dir, f"Benchmark_{n_days}.xlsx")
+            for front_back in variant_routing:
+                list_of_timings = []
+                for repeat in range(repeats):
+                    timings = {}
+
+                    def time_stage(stage, func, *args, **kwargs):
+                        start = time.perf_counter()
+                        result = func(*args, **kwargs)
+                        timings[stage] = time.perf_counter() - start
+                        return result
+
+                    num_files, num_rows = run_benchmark_stages(time_stage, tree_dir, front_back, n_days, parallel, export_path)
+                    list_of_timings.append(timings)
+                peaks = {}
+
+                def measure_stage(stage, func, *args, **kwargs):
+                    tracemalloc.reset_peak()
+                    memory_before = tracemalloc.get_traced_memory()[0]
+                    result = func(*args, **kwargs)
+                    peaks[stage] = (tracemalloc.get_traced_memory()[1] - memory_before) / 1024**2
+                    return result
+
+                tracemalloc.start()
+                try:
+                    run_benchmark_stages(measure_stage, tree_dir, front_back, n_days, parallel, export_path)
+                finally:
+                    tracemalloc.stop()
+                for repeat, timings in enumerate(list_of_timings):
+                    for stage in stages:
+                        seconds = timings[stage]
+                        rows.append({"Tage": n_days, "Tür": front_back, "Dateien": num_files, "Zeilen": num_rows, "Durchlauf": repeat + 1,
+                                     "Stufe": stage, "Sekunden": round(seconds, 4), "Zeilen/s": round(num_rows / seconds) if seconds else None,
+                                     "Peak MB": round(peaks[stage], 2)})
+    df_results = pd.DataFrame(rows)
+    #the fastest run of every stage is reported
+    df_summary = df_results.groupby(["Tage", "Tür", "Dateien", "Zeilen", "Stufe"], sort = False)[["Sekunden", "Zeilen/s", "Peak MB"]].agg(
+        {"Sekunden": "min", "Zeilen/s": "max", "Peak MB": "max"})
+    print(df_summary.to_string())
+    if csv_path:
+        df_results.to_csv(csv_path, index = False, sep = ";", decimal = ",")
+        print(f"Ergebnisse gespeichert: {csv_path}")
+    return df_summary
+
+def run_benchmark_stages(run_stage, tree_dir, front_back, n_days, parallel, export_path):
+    #runs the pipeline of the GUI on one door of the synthetic tree, run_stage(stage, func, *args, **kwargs) measures every stage
+    #returns (number of files, number of rows)
+    file_list = run_stage("Ordner durchsuchen", lambda: sorted(collect_xlsx_files(os.path.join(tree_dir, front_back))))
+    #the cache would measure the cache instead of the reader
+    list_of_df, _ = run_stage("Excel laden", lambda: load_rawdata_files_uncached(file_list, parallel))
+    df_data = run_stage("Datenstruktur", lambda: pd.concat(list_of_df, ignore_index = True).astype({"Roboternummer": "category"}))
+    del list_of_df
+    run_stage("KW-Prüfung", get_calendarweek, df_data)
+    variant_counts = run_stage("Aggregation", create_variant_counts, df_data, front_back)
+    measurements = run_stage("Statistik", create_measurements, df_data)
+    #more than one cw is reported like the "Gesamtzeitraum" mode
+    plot_by_week = n_days > 5
+    summary_name = "gesamt" if plot_by_week else "weekly"
+    report_tables = run_stage("Tabellen", prepare_report, variant_counts, front_back, "Benchmark", plot_by_week, summary_name)
+    list_of_images = run_stage("Diagramme", render_failure_plots, report_tables[2])
+    list_of_statistic_sheets, list_of_histogram_jobs = prepare_statistics(measurements, front_back, "Benchmark")
+    list_of_histograms = run_stage("Histogramme", render_failure_plots, list_of_histogram_jobs, create_plot = create_histogram_plot)
+    run_stage("Excel-Export", create_export, report_tables[0], report_tables[1], list_of_images, export_path, summary_name,
+              list_of_statistic_sheets + report_tables[3],
+              [(sheet_name, image) for (sheet_name, _), image in zip(list_of_statistic_sheets, list_of_histograms)])
+    return len(file_list), len(df_data)
+
+def load_rawdata_files_uncached(file_paths, parallel = None):
+    #benchmarks have to measure the xlsx reader, not the cache of the previous run
+    global use_cache
+    use_cache_before = use_cache
+    use_cache = False
+    try:
+        return load_rawdata_files(file_paths, parallel = parallel)
+    finally:
+        use_cache = use_cache_before
+
+def benchmark_engines(file = None, n_rows = 50000, repeats = 3):
+    #compares all available xlsx readers on one rawdata file, a synthetic file is created if no file is given
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if file is None:
+            print(f"Erzeuge synthetische Datei mit {n_rows:,} Zeilen...")
+            file = write_synthetic_export(os.path.join(tmp_dir, "Rob_8_1", "benchmark.xlsx"), n_rows, "2025-03-03")
+        engines = [engine for engine in read_engines if engine not in ["auto", "calamine"]]
+        if calamine_available:
+            engines.insert(0, "calamine")
+        results = {}
+        for engine in engines:
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                df_file = read_rawdata_file(file, None, engine)
+                timings.append(time.perf_counter() - start)
+            results[engine] = min(timings)
+            print(f"{engine:<18} {results[engine]:8.3f} s  ({len(df_file) / results[engine]:,.0f} Zeilen/s)")
+        if not calamine_available:
+            print("calamine nicht installiert (pip install python-calamine)")
+        for engine in engines[:-1]:
+            print(f"Speedup {engine} gegenüber openpyxl: {results['openpyxl'] / results[engine]:.1f}x")
+    return results
+
+def benchmark_aggregation(n_rows, repeats = 3):
+    #compares the former groupby.apply lambdas with the shared count table on synthetic data of one cw
+    rng = np.random.default_rng(0)
+    df_bench = pd.DataFrame({
+        "Datum": pd.Timestamp("2025-03-03") + pd.to_timedelta(rng.integers(0, 7, n_rows), unit = "D"),
+        "Roboternummer": rng.choice(rob_nums, n_rows),
+        "Fehlernummer": np.where(rng.random(n_rows) < 0.003, rng.integers(1, 40, n_rows), 0)
+    })
+
+    def legacy_aggregation():
+        df_failure = (df_bench.groupby(["Datum", "Roboternummer"], group_keys = False)
+            .apply(lambda df_lambda: (df_lambda["Fehlernummer"] != 0).sum() / len(df_lambda) * 100))
+        weekly_failure = df_bench.groupby("Roboternummer").apply(lambda x: (x["Fehlernummer"] != 0).sum() / len(x) * 100)
+        df_daily = df_bench.groupby([df_bench["Datum"].dt.date, "Roboternummer", "Fehlernummer"]).size().unstack(fill_value=0)
+        df_weekly = df_bench.groupby(["Roboternummer", "Fehlernummer"]).size().unstack(fill_value=0)
+        return df_failure, weekly_failure, df_daily, df_weekly
+
+    def shared_aggregation():
+        failure_counts = create_failure_counts(df_bench)
+        return create_failure_pivot(failure_counts), create_detailed_dataframe(failure_counts), create_detailed_dataframe_weekly(failure_counts)
+
+    results = {}
+    for name, func in [("groupby.apply", legacy_aggregation), ("Zähltabelle", shared_aggregation)]:
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        results[name] = min(timings)
+        print(f"{name:<15} {results[name]:8.3f} s  ({n_rows / results[name]:,.0f} Zeilen/s)")
+    print(f"Speedup: {results['groupby.apply'] / results['Zähltabelle']:.1f}x bei {n_rows:,} Zeilen")
+    return results
+
+def run_cli(argv):
+    #headless batch mode, runs the same pipeline as the GUI without any display or messagebox
+    global read_engine
+    global max_workers
+    global export_statistics
+    global measurement_limits
+    parser = argparse.ArgumentParser(
+        prog = "Schraubdatenauswertung_B10_C9",
+        description = "B10/C9 Schraubauswertung ohne GUI (Batchbetrieb)"
+    )
+    subparsers = parser.add_subparsers(dest = "command", required = True)
+    parser_report = subparsers.add_parser("report", help = "Schraubreports für alle Zeiträume eines Ordners erstellen")
+    parser_report.add_argument("input_folder", help = "Ordner mit den Rohdaten (.xlsx), wird inkl. Unterordnern durchsucht")
+    parser_report.add_argument("output_folder", help = "Ordner zur Abspeicherung der Schraubreports")
+    parser_report.add_argument("--kw", type = int, default = None, help = "nur diese Kalenderwoche auswerten")
+    parser_report.add_argument("--year", type = int, default = None, help = "nur dieses Jahr auswerten")
+    parser_report.add_argument("--kw-from", type = int, default = None, help = "erste auszuwertende Kalenderwoche")
+    parser_report.add_argument("--kw-to", type = int, default = None, help = "letzte auszuwertende Kalenderwoche")
+    parser_report.add_argument("--period", choices = sorted(set(period_names.values())), default = "kw",
+                               help = "ein Report pro Kalenderwoche, Monat, Quartal oder über den gesamten Zeitraum")
+    parser_report.add_argument("--dpi", type = int, default = plot_dpi, help = "Auflösung der Diagramme")
+    parser_report.add_argument("--image-format", choices = plot_formats, default = plot_format, help = "Bildformat der Diagramme")
+    parser_report.add_argument("--engine", choices = read_engines, default = read_engine, help = "xlsx-Reader (Standard: auto)")
+    parser_report.add_argument("--workers", type = int, default = max_workers, help = "Anzahl paralleler Prozesse (Standard: alle CPU-Kerne)")
+    parser_report.add_argument("--profile", action = "store_true", help = "zusätzlich ein cProfile (.prof) in den Ausgabeordner schreiben")
+    parser_update = subparsers.add_parser("update", help = "nur neue oder geänderte Dateien auswerten und betroffene Reports neu erstellen")
+    parser_update.add_argument("input_folder", help = "Ordner mit den Rohdaten (.xlsx), wird inkl. Unterordnern durchsucht")
+    parser_update.add_argument("output_folder", help = "Ordner der Schraubreports, enthält auch das Manifest")
+    parser_update.add_argument("--period", choices = sorted(set(period_names.values())), default = "kw",
+                               help = "ein Report pro Kalenderwoche, Monat, Quartal oder über den gesamten Zeitraum")
+    parser_update.add_argument("--profile", action = "store_true", help = "zusätzlich ein cProfile (.prof) in den Ausgabeordner schreiben")
+    parser_prescan = subparsers.add_parser("prescan", help = "Dateien ohne vollständiges Laden auf Spalten und Kalenderwoche prüfen")
+    parser_prescan.add_argument("input_folder", help = "Ordner mit den Rohdaten (.xlsx), wird inkl. Unterordnern durchsucht")
+    parser_prescan.add_argument("--all-weeks", action = "store_true", help = "Dateien aus mehreren Kalenderwochen erlauben")
+    parser_watch = subparsers.add_parser("watch", help = "Ordner dauerhaft überwachen und die Reports der KW bei neuen Dateien aktualisieren")
+    parser_watch.add_argument("input_folder", help = "Ordner mit den Rohdaten (.xlsx), wird inkl. Unterordnern überwacht")
+    parser_watch.add_argument("output_folder", help = "Ordner der Schraubreports, enthält auch das Manifest")
+    parser_watch.add_argument("--interval", type = float, default = 5, help = "Sekunden zwischen zwei Durchläufen")
+    parser_watch.add_argument("--settle", type = float, default = 10, help = "Sekunden ohne Änderung, bevor eine Datei gelesen wird")
+    parser_watch.add_argument("--max-batch", type = int, default = None, help = "höchstens so viele neue Dateien pro Update (Standard: 4 pro CPU-Kern)")
+    parser_watch.add_argument("--workers", type = int, default = max_workers, help = "Anzahl paralleler Prozesse (Standard: alle CPU-Kerne)")
+    #the reports of update and watch have to be written with the same statistics settings as the reports of report
+    for parser_with_statistics in [parser_report, parser_update, parser_watch]:
+        parser_with_statistics.add_argument("--no-statistics", action = "store_true",
+                                            help = "keine Statistik-Tabellen und Histogramme der Messwerte exportieren")
+        parser_with_statistics.add_argument("--limits", default = None,
+                                            help = "JSON-Datei mit Toleranzgrenzen für Cp/Cpk, z.B. {\"Drehmoment 3\": {\"*\": [11.0, 13.0]}}")
+    parser_ingest = subparsers.add_parser("ingest", help = "Tagesaggregate eines Ordners in die Verlaufsdatenbank schreiben")
+    parser_ingest.add_argument("input_folder", help = "Ordner mit den Rohdaten (.xlsx), wird inkl. Unterordnern durchsucht")
+    parser_ingest.add_argument("--db", default = history_db_path, help = "Pfad der Verlaufsdatenbank")
+    parser_history = subparsers.add_parser("history", help = "Fehlerquote pro Kalenderwoche aus der Verlaufsdatenbank anzeigen")
+    parser_history.add_argument("--year", type = int, required = True, help = "Jahr der Kalenderwochen")
+    parser_history.add_argument("--kw-from", type = int, default = None, help = "erste Kalenderwoche")
+    parser_history.add_argument("--kw-to", type = int, default = None, help = "letzte Kalenderwoche")
+    parser_history.add_argument("--door", choices = list(variant_routing), default = None, help = "nur diese Tür")
+    parser_history.add_argument("--robot", default = None, help = "nur dieser Roboter, z.B. Rob_8_1")
+    parser_history.add_argument("--program", type = int, default = None, help = "nur diese Programmnummer")
+    parser_history.add_argument("--error", type = int, default = None, help = "nur diese Fehlernummer")
+    parser_history.add_argument("--by", choices = ["Roboternummer", "Programmnummer", "Fehlernummer", "Variante", "Tür"], default = "Roboternummer",
+                                help = "Gruppierung innerhalb der Kalenderwoche")
+    parser_history.add_argument("--db", default = history_db_path, help = "Pfad der Verlaufsdatenbank")
+    parser_bench_engines = subparsers.add_parser("benchmark-engines", help = "xlsx-Reader auf einer Rohdatendatei vergleichen")
+    parser_bench_engines.add_argument("--file", default = None, help = "Rohdatendatei, ohne Angabe wird eine synthetische Datei erzeugt")
+    parser_bench_engines.add_argument("--rows", type = int, default = 50000, help = "Zeilen der synthetischen Datei")
+    parser_bench_engines.add_argument("--repeats", type = int, default = 3, help = "Anzahl Wiederholungen, gewertet wird die schnellste")
+    parser_memory = subparsers.add_parser("memory-report", help = "Speicherbedarf der Datenstruktur pro Spalte anzeigen")
+    parser_memory.add_argument("input_folder", help = "Ordner mit den Rohdaten (.xlsx), wird inkl. Unterordnern durchsucht")
+    #10 x a full week: 35 rawdata files with ~50k rows each
+    parser_bench_pipeline = subparsers.add_parser("benchmark-pipeline", help = "alle Stufen der Auswertung auf synthetischen Ordnern messen")
+    parser_bench_pipeline.add_argument("--days", type = int, nargs = "+", default = [1, 5, 20, 65],
+                                       help = "Arbeitstage pro Messung (Standard: Tag, Woche, Monat, Quartal)")
+    parser_bench_pipeline.add_argument("--rows", type = int, default = 2000, help = "Zeilen pro Roboter und Tag")
+    parser_bench_pipeline.add_argument("--repeats", type = int, default = 1, help = "Anzahl Wiederholungen, gewertet wird die schnellste")
+    parser_bench_pipeline.add_argument("--data-dir", default = None, help = "Ordner für die synthetischen Daten, wird bei weiteren Läufen wiederverwendet")
+    parser_bench_pipeline.add_argument("--parallel", action = "store_true", help = "Dateien parallel laden (Speicher der Prozesse wird nicht erfasst)")
+    parser_bench_pipeline.add_argument("--csv", default = None, help = "alle Messwerte als CSV speichern")
+    parser_bench_agg = subparsers.add_parser("benchmark-aggregation", help = "groupby.apply gegen gemeinsame Zähltabelle messen")
+    parser_bench_agg.add_argument("--rows", type = int, default = 10 * 35 * 50000, help = "Anzahl synthetischer Zeilen")
+    parser_bench_agg.add_argument("--repeats", type = int, default = 3, help = "Anzahl Wiederholungen, gewertet wird die schnellste")
+    args = parser.parse_args(argv)
+    #no window is needed to render the plots
+    plt.switch_backend("Agg")
+    if args.command in ["report", "update", "watch"]:
+        export_statistics = not args.no_statistics
+        if args.limits:
+            try:
+                with open(args.limits, encoding = "utf-8") as f:
+                    measurement_limits = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Toleranzgrenzen '{args.limits}' konnten nicht gelesen werden: {e}")
+                return EXIT_NO_DATA
+    if args.command == "report":
+        read_engine = args.engine
+        kw_from = args.kw if args.kw is not None else args.kw_from
+        kw_to = args.kw if args.kw is not None else args.kw_to
+        #the run log is written next to the reports
+        os.makedirs(args.output_folder, exist_ok = True)
+        return run_logged(args.output_folder, "report", cli_report, args.input_folder, args.output_folder, args.period, args.year, kw_from, kw_to,
+                          args.workers, args.dpi, args.image_format, profile = args.profile)
+    elif args.command == "memory-report":
+        df_data, list_of_errors, _ = load_dataframe(sorted(collect_xlsx_files(args.input_folder)))
+        for file, error in list_of_errors:
+            print(f"❌ {file}: {error}")
+        if df_data is None:
+            return EXIT_NO_DATA
+        print(f"{len(df_data)} Zeilen")
+        print(memory_report(df_data).to_string())
+        return EXIT_OK if not list_of_errors else EXIT_PARTIAL_FAILURE
+    elif args.command == "update":
+        os.makedirs(args.output_folder, exist_ok = True)
+        return run_logged(args.output_folder, "update", cli_update, args.input_folder, args.output_folder, args.period, profile = args.profile)
+    elif args.command == "prescan":
+        xlsx_files = sorted(collect_xlsx_files(args.input_folder))
+        valid_files, list_of_rejections, week_year = prescan_rawdata_files(xlsx_files, check_week = not args.all_weeks)
+        for file, reason in list_of_rejections:
+            print(f"❌ {file}: {reason}")
+        print(f"{len(valid_files)} von {len(xlsx_files)} Datei(en) gültig" + (f", KW{week_year[0]} {week_year[1]}" if week_year else ""))
+        if len(valid_files) == 0:
+            return EXIT_NO_DATA
+        return EXIT_OK if not list_of_rejections else EXIT_PARTIAL_FAILURE
+    elif args.command == "watch":
+        max_workers = args.workers
+        if not os.path.isdir(args.input_folder):
+            print(f"Eingabeordner '{args.input_folder}' existiert nicht")
+            return EXIT_NO_DATA
+        os.makedirs(args.output_folder, exist_ok = True)
+        try:
+            watch_folder(args.input_folder, args.output_folder, args.interval, args.settle, args.max_batch)
+        except KeyboardInterrupt:
+            print("Überwachung beendet")
+        return EXIT_OK
+    elif args.command == "ingest":
+        return cli_ingest(args.input_folder, args.db)
+    elif args.command == "history":
+        try:
+            df_history = query_history(args.db, args.year, args.kw_from, args.kw_to, args.door, args.robot, args.program)
+        except ValueError as e:
+            print(e)
+            return EXIT_NO_DATA
+        if len(df_history) == 0:
+            print("Keine Daten für den gewählten Zeitraum in der Verlaufsdatenbank")
+            return EXIT_NO_DATA
+        print(create_failure_rate_trend(df_history, args.by, args.error).to_string())
+        return EXIT_OK
+    elif args.command == "benchmark-engines":
+        benchmark_engines(args.file, args.rows, args.repeats)
+        return EXIT_OK
+    elif args.command == "benchmark-pipeline":
+        benchmark_pipeline(args.days, args.rows, args.repeats, args.data_dir, args.parallel, args.csv)
+        return EXIT_OK
+    elif args.command == "benchmark-aggregation":
+        benchmark_aggregation(args.rows, args.repeats)
+        return EXIT_OK
+
+def cli_report(input_folder, output_folder, period = "kw", year_filter = None, kw_from = None, kw_to = None, workers = None,
+               dpi = None, image_format = None, run_log = None):
+    #creates one report per door and period found in input_folder
+    #the files are streamed into count tables, so hundreds of exports can be evaluated in one run
+    #returns EXIT_OK, EXIT_PARTIAL_FAILURE if single files or reports failed, EXIT_NO_DATA if nothing could be evaluated
+    global max_workers
+    max_workers = workers
+    if not os.path.isdir(input_folder):
+        print(f"Eingabeordner '{input_folder}' existiert nicht")
+        return EXIT_NO_DATA
+    os.makedirs(output_folder, exist_ok = True)
+    xlsx_files = timed_stage(run_log, "Ordner durchsuchen", lambda: sorted(collect_xlsx_files(input_folder)), rows = len)
+    if len(xlsx_files) == 0:
+        print(f"Keine .xlsx-Dateien in '{input_folder}' gefunden")
+        return EXIT_NO_DATA
+    #with a year or cw filter only the files of the selected weeks are loaded, an archive folder is not read completely
+    if year_filter is not None or kw_from is not None or kw_to is not None:
+        xlsx_files = timed_stage(run_log, "Vorauswahl KW", select_files_by_week, xlsx_files, year_filter, kw_from, kw_to, rows = len)
+        if len(xlsx_files) == 0:
+            print("Keine Daten für den gewählten Zeitraum gefunden")
+            return EXIT_NO_DATA
+    exit_code = EXIT_OK
+
+    #both doors can be evaluated in one run, the door is taken from the path of every file
+    counts, list_of_errors, measurement_parts = timed_stage(run_log, "Excel laden + Zählen", stream_failure_counts, xlsx_files,
+                                                            with_measurements = export_statistics, rows = count_stream_rows)
+    for file, error in list_of_errors:
+        print(f"❌ {file}: {error}")
+        exit_code = EXIT_PARTIAL_FAILURE
+    if counts is None:
+        return EXIT_NO_DATA
+    counts = filter_counts_by_week(counts, year_filter, kw_from, kw_to)
+
+    report_jobs = []
+    for door in counts.index.get_level_values("Tür").unique():
+        report_jobs += split_counts_by_period(counts.xs(door, level = "Tür"), door, period, output_folder)
+    if len(report_jobs) == 0:
+        print("Keine Daten für den gewählten Zeitraum gefunden")
+        return EXIT_NO_DATA
+
+    #create the reports, several periods and doors are processed in parallel
+    #every worker only gets the statistics of its own report, they are finished here since only this process knows the tolerance limits
+    report_items = timed_stage(run_log, "Statistik", lambda: [
+        (job, finish_measurements(select_measurements(measurement_parts, job[1], job[0].index.get_level_values("Datum")))
+         if measurement_parts is not None else None) for job in report_jobs], rows = count_measurement_rows(measurement_parts))
+    results = [None] * len(report_jobs)
+    for index, result, error in process_parallel(run_report_job, report_items, dpi, image_format, parallel = parallel_loading):
+        #the stages of the worker processes are collected in their own logs
+        save_name, job_log = result if error is None else (None, [])
+        results[index] = (save_name, error)
+        if run_log is not None:
+            run_log += job_log
+
+    for (_, door, period_title, _, _, _), (save_name, error) in zip(report_jobs, results):
+        if error is None:
+            print(f"✔ {door} {period_title}: {save_name}")
+        else:
+            print(f"❌ {door} {period_title}: {error}")
+            exit_code = EXIT_PARTIAL_FAILURE
+    return exit_code
+
+def cli_update(input_folder, output_folder, period = "kw", run_log = None):
+    #incremental update of the reports in output_folder, same exit codes as cli_report
+    if not os.path.isdir(input_folder):
+        print(f"Eingabeordner '{input_folder}' existiert nicht")
+        return EXIT_NO_DATA
+    os.makedirs(output_folder, exist_ok = True)
+    xlsx_files = timed_stage(run_log, "Ordner durchsuchen", lambda: sorted(collect_xlsx_files(input_folder)), rows = len)
+    list_of_save_names, list_of_errors, num_counted = incremental_update(xlsx_files, output_folder, period, run_log = run_log)
+    print(f"{num_counted} neue oder geänderte Datei(en) ausgewertet")
+    for file, error in list_of_errors:
+        print(f"❌ {file}: {error}")
+    for save_name in list_of_save_names:
+        print(f"✔ {save_name}")
+    return EXIT_OK if not list_of_errors else EXIT_PARTIAL_FAILURE
+
+def cli_ingest(input_folder, db_path):
+    #imports the daily aggregates of all rawdata files, already stored days are replaced
+    if not os.path.isdir(input_folder):
+        print(f"Eingabeordner '{input_folder}' existiert nicht")
+        return EXIT_NO_DATA
+    xlsx_files = sorted(collect_xlsx_files(input_folder))
+    file_cache_dir = cache_dir if use_cache else None
+    engine = resolve_read_engine()
+    exit_code = EXIT_OK
+    list_of_aggregates = []
+    for index, df_aggregates, error in process_parallel(aggregate_rawdata_file, xlsx_files, file_cache_dir, engine):
+        if error is None:
+            list_of_aggregates.append(df_aggregates)
+        else:
+            print(f"❌ {xlsx_files[index]}: {error}")
+            exit_code = EXIT_PARTIAL_FAILURE
+    if not list_of_aggregates:
+        return EXIT_NO_DATA
+    #all files are written together, otherwise the last file of a split robot-day would replace the others
+    num_rows = write_history(db_path, merge_history_aggregates(list_of_aggregates))
+    if num_rows == 0:
+        return EXIT_NO_DATA
+    print(f"{num_rows} Tagesaggregate aus {len(xlsx_files)} Datei(en) in '{db_path}' gespeichert")
+    return exit_code
+
+def run_report_job(report_item, dpi = None, image_format = None):
+    #worker function of the cli, the image settings are passed explicitly since worker processes do not share the globals
+    #report_item = (report job, measurements of the report or None), returns (save_name, stages of the run log)
+    job, measurements = report_item
+    job_log = []
+    return create_report_from_counts(*job, dpi = dpi, image_format = image_format, run_log = job_log, measurements = measurements), job_log
+
 if __name__ == "__main__":  
+    #needed for the process pool within the pyinstaller .exe build
+    multiprocessing.freeze_support()
+    #command line arguments start the headless batch mode instead of the GUI
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
+    #figures are only rendered into the report, the worker thread must not use the Tk backend
+    plt.switch_backend("Agg")
     #Setup Main Window
     root = tk.Tk()
     root.title("B10/C9 Schraubauswertung")
-    root.geometry("350x320")
+    root.geometry("350x470")
     root.resizable(False, False)
     #iconbitmap does not work with .exe build without bigger changes
     #root.iconbitmap("ressources/logo_yf.ico")
@@ -422,13 +2423,35 @@ if __name__ == "__main__":
                         text="0 Dateien ausgewählt")
     lbl_status.grid(row=0, column=1, sticky="w", padx=(20, 0))
 
+    #selection of the evaluation period, everything except "Kalenderwoche" uses the streaming mode
+    lbl_period = ttk.Label(frame_xlsx,
+                        text="Auswertezeitraum")
+    lbl_period.grid(row=1, column=0, sticky="w", pady=(10, 0))
+    cmb_period = ttk.Combobox(frame_xlsx,
+                            values=list(period_names.keys()),
+                            state="readonly")
+    cmb_period.current(0)
+    cmb_period.bind("<<ComboboxSelected>>", select_period)
+    cmb_period.grid(row=1, column=1, sticky="ew", pady=(10, 0))
+
     #button for submitting the selected data
     btn_submit_xlsx = ttk.Button(
         frame_xlsx,
         text="Erstelle Datenstruktur",
         command= build_dataframe       
     )
-    btn_submit_xlsx.grid(row=1, column=0, columnspan = 2, sticky="ew", pady=10)
+    btn_submit_xlsx.grid(row=2, column=0, columnspan = 2, sticky="ew", pady=10)
+
+    #progress of the running background task
+    progress_bar = ttk.Progressbar(frame_xlsx, mode="determinate", maximum=100)
+    progress_bar.grid(row=3, column=0, sticky="ew", padx=(0, 10))
+
+    #button for cancelling the running background task
+    btn_cancel = ttk.Button(frame_xlsx,
+                            text="Abbrechen",
+                            command=cancel_background_task,
+                            state="disabled")
+    btn_cancel.grid(row=3, column=1, sticky="ew")
     
     #Separator
     ttk.Separator(frame_xlsx, orient="horizontal") \
@@ -445,16 +2468,24 @@ if __name__ == "__main__":
                             text="Export starten",
                             command=main_filter_func,
                             style="Export.TButton")
-    btn_export.grid(row=7, column=0, pady=20, sticky="ew", columnspan = 2)
+    btn_export.grid(row=7, column=0, pady=(20, 10), sticky="ew", columnspan = 2)
+
+    #Button for the daily update of existing reports with only the new files
+    btn_update = ttk.Button(frame_xlsx,
+                            text="Reports aktualisieren (nur neue Dateien)",
+                            command=update_reports)
+    btn_update.grid(row=8, column=0, sticky="ew", columnspan = 2)
 
     #Separator
     ttk.Separator(frame_xlsx, orient="horizontal") \
-        .grid(row=8, column=0, sticky="ew", pady=15, columnspan = 2)
+        .grid(row=9, column=0, sticky="ew", pady=15, columnspan = 2)
 
     #Author + Version
     lbl_version = ttk.Label(frame_xlsx,
                             text="Phillip Kusinski, V1.1",
                             style="TLabel") 
-    lbl_version.grid(row=9, column=1, sticky="e")
+    lbl_version.grid(row=10, column=1, sticky="e")
 
+    #start polling the results of the background worker
+    root.after(100, poll_gui_queue)
     root.mainloop()
\ No newline at end of file